@@ -0,0 +1,94 @@
+"""
+Benchmark of rendering a large person result to a response body.
+
+Compares the previous path (the handler returns {"message": rows}, FastAPI runs
+jsonable_encoder over every row and field and JSONResponse renders the result) with
+the response classes of utils/responses.py: PersonJSONResponse (orjson writes the rows
+straight to bytes), MessagePack and columnar JSON. For each format the encode time,
+the time a client needs to decode the body and the body size are printed.
+Rows are real `databases` records read from a temporary SQLite database, so aiosqlite
+must be installed; no database server is needed. The JSON bodies are checked to be equal.
+
+Usage:
+    python -m benchmarks.bench_serialization [--rows 10000] [--number 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import timeit
+from datetime import date
+
+import databases
+import sqlalchemy
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import msgpack
+import orjson
+
+from models.person import metadata, person_table as Person
+from utils.responses import PersonJSONResponse, PersonMsgPackResponse, PersonColumnarJSONResponse
+from utils.statements import person_statements
+
+
+def _person(i: int) -> dict:
+    return {
+        "name": "Марина",
+        "surname": "Петренко",
+        "patronym": "Петрівна",
+        "dateOfBirth": date(2000, 1, 1),
+        "gender": "female",
+        "rnokpp": f"{i:010d}",
+        "passportNumber": f"{i:09d}",
+        "unzr": f"20000101-{i % 100000:05d}",
+    }
+
+
+async def _read_rows(path: str, count: int) -> list:
+    engine = sqlalchemy.create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(Person.insert(), [_person(i) for i in range(count)])
+    engine.dispose()
+
+    db = databases.Database(f"sqlite+aiosqlite:///{path}")
+    await db.connect()
+    try:
+        return await db.fetch_all(person_statements(db).select_page(False).bind(limit=count))
+    finally:
+        await db.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="rows in the response")
+    parser.add_argument("--number", type=int, default=5, help="iterations per case")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = asyncio.run(_read_rows(os.path.join(directory, "bench.db"), args.rows))
+
+    def old_path():
+        return JSONResponse(jsonable_encoder({"message": rows})).body
+
+    cases = [
+        ("jsonable_encoder", old_path, orjson.loads),
+        ("json (orjson)", lambda: PersonJSONResponse({"message": rows}).body, orjson.loads),
+        ("msgpack", lambda: PersonMsgPackResponse({"message": rows}).body, msgpack.unpackb),
+        ("columnar json", lambda: PersonColumnarJSONResponse({"message": rows}).body, orjson.loads),
+    ]
+
+    if json.loads(old_path()) != json.loads(cases[1][1]()):
+        raise SystemExit("Response bodies differ")
+
+    print(f"{'format':<20}{'encode, ms':>12}{'decode, ms':>12}{'bytes':>12}")
+    for name, encode, decode in cases:
+        body = encode()
+        encode_ms = min(timeit.repeat(encode, number=args.number, repeat=3)) / args.number * 1e3
+        decode_ms = min(timeit.repeat(lambda: decode(body), number=args.number, repeat=3)) / args.number * 1e3
+        print(f"{name:<20}{encode_ms:>12.1f}{decode_ms:>12.1f}{len(body):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark of the tracing overhead of one database operation, per span detail level.
+
+Times the span code a request runs around its query ("DB: select persons by parameter"):
+the previous code (a span with five attributes set unconditionally) and utils.tracing.db_span
+with detail off, minimal and full, in three setups:
+  no SDK       telemetry disabled: the OpenTelemetry API without a tracer provider
+  sampled      SDK tracer provider, every span recorded and exported (to a null exporter)
+  not sampled  SDK tracer provider with sample ratio 0
+The query itself is not run, so the numbers are the cost of tracing alone.
+
+Usage:
+    python -m benchmarks.bench_tracing [--number 20000]
+"""
+import argparse
+import timeit
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON, Sampler
+
+from models.person import person_table as Person
+from utils import tracing
+from utils.statements import PersonStatements
+
+SPAN_NAME = "DB: select persons by parameter"
+
+
+class _NullExporter(SpanExporter):
+    def export(self, spans):
+        return SpanExportResult.SUCCESS
+
+
+# Sampler that delegates to a replaceable sampler, as the tracer provider can only be set once
+class _SwitchableSampler(Sampler):
+    def __init__(self):
+        self.sampler = ALWAYS_ON
+
+    def should_sample(self, *args, **kwargs):
+        return self.sampler.should_sample(*args, **kwargs)
+
+    def get_description(self):
+        return "Switchable"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="iterations per case")
+    args = parser.parse_args()
+
+    tracer = trace.get_tracer(__name__)
+    statement = PersonStatements("mysql").select_by(("unzr",))
+
+    def before():
+        with tracer.start_as_current_span(SPAN_NAME) as span:
+            span.set_attribute("db.system", "mysql")
+            span.set_attribute("db.operation", "SELECT")
+            span.set_attribute("db.statement", statement.sql)
+            span.set_attribute("db.table", Person.name)
+            span.set_attribute("app.layer", "database")
+
+    def after():
+        with tracing.db_span(tracer, SPAN_NAME, "SELECT", statement.sql):
+            pass
+
+    def measure(function) -> float:
+        function()
+        return min(timeit.repeat(function, number=args.number, repeat=5)) / args.number * 1e6
+
+    def run(setup: str, levels):
+        results = [("before", measure(before))]
+        for level in levels:
+            tracing.set_detail(level)
+            results.append((level, measure(after)))
+        print(f"{setup:<14}" + "".join(f"{us:>12.2f}" for _, us in results))
+
+    print(f"{'setup, us':<14}" + "".join(f"{name:>12}" for name in ("before", "off", "minimal", "full")))
+
+    # Without an SDK provider (telemetry disabled) configure_telemetry sets detail "off"
+    print(f"{'no SDK':<14}{measure(before):>12.2f}", end="")
+    tracing.set_detail("off")
+    print(f"{measure(after):>12.2f}{'-':>12}{'-':>12}")
+
+    sampler = _SwitchableSampler()
+    provider = TracerProvider(sampler=sampler)
+    provider.add_span_processor(SimpleSpanProcessor(_NullExporter()))
+    trace.set_tracer_provider(provider)
+
+    run("sampled", ("off", "minimal", "full"))
+    sampler.sampler = ALWAYS_OFF
+    run("not sampled", ("off", "minimal", "full"))
+    provider.shutdown()
+
+
+if __name__ == "__main__":
+    main()
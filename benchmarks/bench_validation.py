@@ -0,0 +1,46 @@
+"""
+Micro-benchmark of path parameter validation for GET/DELETE /person/{param}/{value}.
+
+Compares the registry of precompiled field checks (utils.validation.validate_parameter)
+with validation by instantiating the whole pydantic model
+(utils.validation.validate_parameter_with_model, the previous implementation).
+
+Usage:
+    python -m benchmarks.bench_validation [--number 20000]
+"""
+import argparse
+import logging
+import timeit
+
+from models.person import PersonGet, PersonDelete
+from utils.validation import validate_parameter, validate_parameter_with_model
+
+CASES = [
+    ("unzr", "20000101-00001", PersonGet),
+    ("rnokpp", "0123456789", PersonGet),
+    ("passportNumber", "АБ 123456", PersonGet),
+    ("surname", "Петренко", PersonGet),
+    ("dateOfBirth", "2000-01-01", PersonGet),
+    ("unzr", "20000101-00001", PersonDelete),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="iterations per case")
+    args = parser.parse_args()
+
+    # Measure validation itself, not the log handlers
+    logging.disable(logging.CRITICAL)
+
+    print(f"{'model.field':<28}{'model, us':>12}{'registry, us':>14}{'speedup':>10}")
+    for param, value, model in CASES:
+        old_us = min(timeit.repeat(lambda: validate_parameter_with_model(param, value, model),
+                                   number=args.number, repeat=3)) / args.number * 1e6
+        new_us = min(timeit.repeat(lambda: validate_parameter(param, value, model),
+                                   number=args.number, repeat=3)) / args.number * 1e6
+        print(f"{model.__name__ + '.' + param:<28}{old_us:>12.2f}{new_us:>14.2f}{old_us / new_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Generator of synthetic person records that pass the validators of PersonMainModel.
+
+Every record is a function of the seed and its number, so a data set can be reproduced
+from the seed alone and record i can be rebuilt without generating the ones before it.
+Unique keys come from seeded permutations of the record number and never repeat:
+  unzr            YYYYMMDD-XXXXC, date = dateOfBirth (1930-2019), C = 7-3-1 check digit
+  rnokpp          10 digits
+  passportNumber  9 digits, or "АБ 123456" (old format) for about 30% of the records
+Names, surnames and patronyms contain letters and apostrophes only.
+
+Output:
+  --ndjson FILE / --csv FILE   write the records to a file ("-" = stdout)
+  --load                       insert them into the person table of config.ini (or --url):
+                               chunked multi-row INSERTs, or with --method load-data a
+                               MySQL LOAD DATA LOCAL INFILE (needs local_infile=ON on the server)
+  --check                      also validate every record with PersonMainModel (slow)
+
+Usage:
+    python -m benchmarks.generate_persons --count 1000000 --seed 42 --csv persons.csv
+    python -m benchmarks.generate_persons --count 1000000 --seed 42 --load [--method load-data]
+"""
+import argparse
+import asyncio
+import csv
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Iterator
+
+import orjson
+
+FIELDS = ("name", "surname", "patronym", "dateOfBirth", "gender", "rnokpp", "passportNumber", "unzr")
+
+FIRST_BIRTH_DATE = date(1930, 1, 1)
+BIRTH_DAYS = (date(2019, 12, 31) - FIRST_BIRTH_DATE).days + 1
+UNZR_CODES = 10000
+OLD_PASSPORT_SHARE = 0.3
+
+MALE_NAMES = (
+    "Олександр", "Андрій", "Михайло", "Дмитро", "Іван", "Сергій", "Петро", "Василь", "Юрій", "Богдан",
+    "Тарас", "Олег", "Віктор", "Микола", "Володимир", "Євген", "Роман", "Степан", "Ярослав", "Григорій",
+)
+FEMALE_NAMES = (
+    "Олена", "Марина", "Ірина", "Наталія", "Оксана", "Тетяна", "Юлія", "Світлана", "Ганна", "Катерина",
+    "Людмила", "Софія", "Мар'яна", "Вікторія", "Дарина", "Галина", "Анастасія", "Христина", "Лариса", "Зоряна",
+)
+# Father's name: male and female patronym
+PATRONYMS = (
+    ("Олександрович", "Олександрівна"), ("Андрійович", "Андріївна"), ("Михайлович", "Михайлівна"),
+    ("Дмитрович", "Дмитрівна"), ("Іванович", "Іванівна"), ("Сергійович", "Сергіївна"),
+    ("Петрович", "Петрівна"), ("Васильович", "Василівна"), ("Юрійович", "Юріївна"),
+    ("Богданович", "Богданівна"), ("Тарасович", "Тарасівна"), ("Олегович", "Олегівна"),
+    ("Вікторович", "Вікторівна"), ("Миколайович", "Миколаївна"), ("Володимирович", "Володимирівна"),
+)
+# Surnames that are the same for men and women
+SURNAMES = (
+    "Шевченко", "Коваленко", "Бондаренко", "Ткаченко", "Кравченко", "Олійник", "Шевчук", "Поліщук",
+    "Бойко", "Мельник", "Петренко", "Симоненко", "Лисенко", "Руденко", "Марченко", "Савченко",
+    "Ковальчук", "Гончаренко", "Дем'яненко", "Мороз", "Клименко", "Павленко", "Кузьменко", "Левченко",
+    "Карпенко", "Остапчук", "Зінченко", "Прокопенко", "Лук'яненко", "Гребенюк", "Приходько", "Максименко",
+)
+# Letters of the old passport series: OLD_PASSPORT_PATTERN accepts А-Я, Ъ, Ы, Ь and Э are not used
+SERIES_LETTERS = [chr(code) for code in range(ord("А"), ord("Я") + 1) if chr(code) not in "ЪЫЬЭ"]
+
+MAX_COUNT = BIRTH_DAYS * UNZR_CODES
+
+
+def _splitmix64(value: int) -> int:
+    value = (value + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return value ^ (value >> 31)
+
+
+# Seeded permutation i -> (a * i + b) mod size; a is coprime to size, so no two i give the same value
+class _Permutation:
+    def __init__(self, rng: random.Random, size: int):
+        self.size = size
+        self.a = rng.randrange(1, size)
+        while math.gcd(self.a, size) != 1:
+            self.a = rng.randrange(1, size)
+        self.b = rng.randrange(size)
+
+    def __call__(self, i: int) -> int:
+        return (self.a * i + self.b) % self.size
+
+
+def unzr_check_digit(digits: str) -> int:
+    return sum(int(digit) * (7, 3, 1)[position % 3] for position, digit in enumerate(digits)) % 10
+
+
+class PersonGenerator:
+    def __init__(self, seed: int = 0):
+        rng = random.Random(seed)
+        self.seed = seed
+        self._unzr = _Permutation(rng, MAX_COUNT)
+        self._rnokpp = _Permutation(rng, 10 ** 10)
+        self._passport = _Permutation(rng, 10 ** 9)
+        self._old_passport = _Permutation(rng, len(SERIES_LETTERS) ** 2 * 10 ** 6)
+        self._salt = rng.getrandbits(64)
+
+    # Record number i (0 <= i < MAX_COUNT)
+    def person(self, i: int) -> dict:
+        bits = _splitmix64(self._salt ^ i)
+        female = bits & 1
+        bits >>= 1
+
+        unzr_number = self._unzr(i)
+        birth_date = FIRST_BIRTH_DATE + timedelta(days=unzr_number // UNZR_CODES)
+        unzr_digits = f"{birth_date:%Y%m%d}{unzr_number % UNZR_CODES:04d}"
+
+        if (bits & 0xFF) < OLD_PASSPORT_SHARE * 256:
+            series, number = divmod(self._old_passport(i), 10 ** 6)
+            first, second = divmod(series, len(SERIES_LETTERS))
+            passport = f"{SERIES_LETTERS[first]}{SERIES_LETTERS[second]} {number:06d}"
+        else:
+            passport = f"{self._passport(i):09d}"
+        bits >>= 8
+
+        patronym = PATRONYMS[bits % len(PATRONYMS)][female]
+        bits >>= 8
+
+        names = FEMALE_NAMES if female else MALE_NAMES
+        return {
+            "name": names[bits % len(names)],
+            "surname": SURNAMES[(bits >> 8) % len(SURNAMES)],
+            "patronym": patronym,
+            "dateOfBirth": birth_date.isoformat(),
+            "gender": "female" if female else "male",
+            "rnokpp": f"{self._rnokpp(i):010d}",
+            "passportNumber": passport,
+            "unzr": f"{unzr_digits[:8]}-{unzr_digits[8:]}{unzr_check_digit(unzr_digits)}",
+        }
+
+    def persons(self, count: int, start: int = 0) -> Iterator[dict]:
+        if start + count > MAX_COUNT:
+            raise ValueError(f"At most {MAX_COUNT} unique records can be generated")
+        for i in range(start, start + count):
+            yield self.person(i)
+
+
+def write_ndjson(persons: Iterator[dict], output) -> int:
+    written = 0
+    for person in persons:
+        output.write(orjson.dumps(person) + b"\n")
+        written += 1
+    return written
+
+
+def write_csv(persons: Iterator[dict], output, header: bool = True) -> int:
+    writer = csv.writer(output, lineterminator="\n")
+    if header:
+        writer.writerow(FIELDS)
+    written = 0
+    for person in persons:
+        writer.writerow([person[field] for field in FIELDS])
+        written += 1
+    return written
+
+
+# Chunked INSERTs, one transaction per chunk. The rows of a chunk are sent as an executemany,
+# which SQLAlchemy and the driver turn into multi-row INSERT statements.
+async def load_with_inserts(url: str, persons: Iterator[dict], chunk_rows: int) -> int:
+    from sqlalchemy import insert
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from models.person import person_table as Person
+
+    async def insert_chunk(chunk):
+        async with engine.begin() as connection:
+            await connection.execute(insert(Person), chunk)
+
+    loaded = 0
+    engine = create_async_engine(url)
+    try:
+        chunk = []
+        for person in persons:
+            person["dateOfBirth"] = date.fromisoformat(person["dateOfBirth"])
+            chunk.append(person)
+            if len(chunk) == chunk_rows:
+                await insert_chunk(chunk)
+                loaded += len(chunk)
+                chunk = []
+        if chunk:
+            await insert_chunk(chunk)
+            loaded += len(chunk)
+    finally:
+        await engine.dispose()
+    return loaded
+
+
+# LOAD DATA LOCAL INFILE of a temporary CSV file: MySQL/MariaDB only, and the server
+# must allow it (local_infile=ON)
+async def load_with_load_data(url: str, persons: Iterator[dict]) -> int:
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    if not url.startswith("mysql+"):
+        raise SystemExit("--method load-data needs a MySQL/MariaDB database")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "persons.csv")
+        with open(path, "w", encoding="utf-8", newline="") as output:
+            count = write_csv(persons, output, header=False)
+
+        engine = create_async_engine(url, connect_args={"local_infile": True})
+        try:
+            async with engine.begin() as connection:
+                await connection.execute(text(
+                    "LOAD DATA LOCAL INFILE :path INTO TABLE person CHARACTER SET utf8mb4 "
+                    "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' LINES TERMINATED BY '\\n' "
+                    "(name, surname, patronym, dateOfBirth, gender, rnokpp, passportNumber, unzr)"
+                ), {"path": path})
+        finally:
+            await engine.dispose()
+    return count
+
+
+def _checked(persons: Iterator[dict]) -> Iterator[dict]:
+    from models.person import PersonMainModel
+
+    for person in persons:
+        PersonMainModel(**person)
+        yield person
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, required=True, help="number of records")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the data set")
+    parser.add_argument("--start", type=int, default=0, help="number of the first record, to extend a data set")
+    parser.add_argument("--ndjson", help="write NDJSON to this file, '-' for stdout")
+    parser.add_argument("--csv", help="write CSV to this file, '-' for stdout")
+    parser.add_argument("--load", action="store_true", help="insert the records into the database")
+    parser.add_argument("--url", help="database URL (default: the [database] section of config.ini)")
+    parser.add_argument("--method", choices=("insert", "load-data"), default="insert", help="how to load the records")
+    parser.add_argument("--chunk-rows", type=int, default=5000, help="rows per INSERT with --method insert")
+    parser.add_argument("--check", action="store_true", help="validate every record with PersonMainModel")
+    args = parser.parse_args()
+
+    if sum(bool(target) for target in (args.ndjson, args.csv, args.load)) != 1:
+        parser.error("use exactly one of --ndjson, --csv and --load")
+
+    persons = PersonGenerator(args.seed).persons(args.count, args.start)
+    if args.check:
+        persons = _checked(persons)
+
+    started = time.monotonic()
+    if args.ndjson:
+        if args.ndjson == "-":
+            count = write_ndjson(persons, sys.stdout.buffer)
+        else:
+            with open(args.ndjson, "wb") as output:
+                count = write_ndjson(persons, output)
+    elif args.csv:
+        if args.csv == "-":
+            count = write_csv(persons, sys.stdout)
+        else:
+            with open(args.csv, "w", encoding="utf-8", newline="") as output:
+                count = write_csv(persons, output)
+    else:
+        from utils.config_utils import load_config, get_database_url
+
+        url = args.url or get_database_url(load_config("config.ini"))
+        if args.method == "load-data":
+            count = asyncio.run(load_with_load_data(url, persons))
+        else:
+            count = asyncio.run(load_with_inserts(url, persons, args.chunk_rows))
+
+    elapsed = time.monotonic() - started
+    print(f"{count} records in {elapsed:.1f} s ({count / max(elapsed, 1e-9):.0f} records/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
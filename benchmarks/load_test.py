@@ -0,0 +1,325 @@
+"""
+Load test of the service with a local SQLite database instead of a database server.
+
+Creates a temporary SQLite database with the person table and seed rows, starts the
+application from main.py with uvicorn (configured through environment variables only,
+config.ini is not read), and runs a weighted mix of requests at each concurrency level:
+
+    get          GET    /person/unzr/{unzr}          existing record
+    get_by_date  GET    /person/dateOfBirth/{date}   birth date of an existing record
+    get_all      GET    /person?limit=100            first page
+    search       POST   /person/search               unzr_in with 50 existing UNZRs
+    post         POST   /person                      new record
+    put          PUT    /person                      existing record with a changed name
+    delete       DELETE /person/unzr/{unzr}          record created by "post" in this run
+
+The report is JSON: for every concurrency level the total throughput and, per operation,
+the number of requests and errors (HTTP status >= 400), throughput and p50/p95/p99/max
+latency in milliseconds. Save it with --output to compare runs over time.
+Requires httpx and aiosqlite; no other service is needed.
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 1,8,32] [--duration 10] [--seed-rows 10000]
+                                   [--mix get=45,get_by_date=5,get_all=5,search=10,post=15,put=15,delete=5]
+                                   [--workers 1] [--data-seed 0] [--output result.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+import httpx
+import sqlalchemy
+
+from benchmarks.generate_persons import FEMALE_NAMES, MALE_NAMES, PersonGenerator
+from models.person import metadata, person_table as Person
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = "get=45,get_by_date=5,get_all=5,search=10,post=15,put=15,delete=5"
+SEARCH_KEYS = 50
+
+
+def create_database(path: str, generator: PersonGenerator, rows: int) -> None:
+    engine = sqlalchemy.create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        # WAL lets readers run while a write is in progress
+        connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        for first in range(0, rows, 5000):
+            chunk = []
+            for data in generator.persons(min(5000, rows - first), first):
+                data["dateOfBirth"] = date.fromisoformat(data["dateOfBirth"])
+                chunk.append(data)
+            connection.execute(Person.insert(), chunk)
+    engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Environment of the service: configured through environment variables only, config.ini is not read
+def server_env(db_path: str, cache: bool = False, telemetry: bool = False) -> dict:
+    return dict(
+        os.environ,
+        USE_ENV_CONFIG="true",
+        DB_TYPE="sqlite",
+        DB_NAME=db_path,
+        LOG_LEVEL="warning",
+        LOG_FILENAME="",
+        LOG_HEADERS="off",
+        OTEL_ENABLED="true" if telemetry else "false",
+        CACHE_ENABLED="true" if cache else "false",
+    )
+
+
+def start_server(db_path: str, port: int, workers: int, cache: bool, telemetry: bool = False) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+        "--log-level", "warning", "--no-access-log",
+    ]
+    return subprocess.Popen(command, cwd=ROOT, env=server_env(db_path, cache, telemetry))
+
+
+async def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise SystemExit(f"Server exited with code {server.returncode}")
+            try:
+                if (await client.get("/openapi.json")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit("Server did not start in time")
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation '{name}', use: {', '.join(OPERATIONS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+# Shared state of a run: seed rows are updated and read, "post" adds rows that "delete" removes.
+# Record i is generator.person(i); the seed rows are records 0 .. seed_rows - 1.
+class Workload:
+    def __init__(self, generator: PersonGenerator, seed_rows: int):
+        self.generator = generator
+        self.seed_rows = seed_rows
+        self.next_index = max(seed_rows, 1)
+        self.created = []
+
+    def new_index(self) -> int:
+        index = self.next_index
+        self.next_index += 1
+        return index
+
+    def person(self, index: int) -> dict:
+        return self.generator.person(index)
+
+
+async def op_get(client, workload, rng):
+    return await client.get(f"/person/unzr/{workload.person(rng.randrange(workload.seed_rows))['unzr']}")
+
+
+async def op_get_by_date(client, workload, rng):
+    return await client.get(f"/person/dateOfBirth/{workload.person(rng.randrange(workload.seed_rows))['dateOfBirth']}")
+
+
+async def op_get_all(client, workload, rng):
+    return await client.get("/person", params={"limit": 100})
+
+
+async def op_search(client, workload, rng):
+    indexes = rng.sample(range(workload.seed_rows), min(SEARCH_KEYS, workload.seed_rows))
+    return await client.post("/person/search", json={"unzr_in": [workload.person(i)["unzr"] for i in indexes]})
+
+
+async def op_post(client, workload, rng):
+    index = workload.new_index()
+    response = await client.post("/person", json=workload.person(index))
+    if response.status_code == 200:
+        workload.created.append(index)
+    return response
+
+
+async def op_put(client, workload, rng):
+    data = workload.person(rng.randrange(workload.seed_rows))
+    data["name"] = rng.choice(FEMALE_NAMES if data["gender"] == "female" else MALE_NAMES)
+    return await client.put("/person", json=data)
+
+
+async def op_delete(client, workload, rng):
+    if not workload.created:
+        return None
+    index = workload.created.pop(rng.randrange(len(workload.created)))
+    return await client.delete(f"/person/unzr/{workload.person(index)['unzr']}")
+
+
+OPERATIONS = {
+    "get": op_get,
+    "get_by_date": op_get_by_date,
+    "get_all": op_get_all,
+    "search": op_search,
+    "post": op_post,
+    "put": op_put,
+    "delete": op_delete,
+}
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_level(base_url: str, workload: Workload, mix: dict, concurrency: int,
+                    duration: float, warmup: float, seed: int) -> dict:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def user(number: int, until: float, record: bool):
+            rng = random.Random(seed * 1000 + number)
+            while time.monotonic() < until:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                response = await OPERATIONS[name](client, workload, rng)
+                elapsed = time.perf_counter() - started
+                if response is None or not record:
+                    continue
+                samples[name].append(elapsed)
+                if response.status_code >= 400:
+                    errors[name] += 1
+
+        if warmup > 0:
+            until = time.monotonic() + warmup
+            await asyncio.gather(*(user(n, until, False) for n in range(concurrency)))
+
+        started = time.monotonic()
+        until = started + duration
+        await asyncio.gather(*(user(n, until, True) for n in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    endpoints = {}
+    for name in names:
+        latencies = sorted(samples[name])
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": errors[name],
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        }
+    total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(errors.values()),
+        "throughput_rps": round(total / elapsed, 1),
+        "endpoints": endpoints,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "person.db")
+        generator = PersonGenerator(args.data_seed)
+        create_database(db_path, generator, args.seed_rows)
+
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(db_path, port, args.workers, args.cache)
+        try:
+            await wait_until_ready(base_url, server)
+            workload = Workload(generator, args.seed_rows)
+            runs = []
+            for level in levels:
+                result = await run_level(base_url, workload, mix, level, args.duration, args.warmup, args.seed)
+                print(f"concurrency {level}: {result['throughput_rps']} req/s, {result['errors']} errors",
+                      file=sys.stderr)
+                runs.append(result)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    return {
+        "meta": {
+            "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "database": "sqlite",
+            "seed_rows": args.seed_rows,
+            "data_seed": args.data_seed,
+            "workers": args.workers,
+            "cache": args.cache,
+            "duration_s": args.duration,
+            "mix": mix,
+        },
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated numbers of concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured per concurrency level")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds of unmeasured load before each level")
+    parser.add_argument("--seed-rows", type=int, default=10000, help="records created before the test")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--cache", action="store_true", help="enable the person lookup cache")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the request mix")
+    parser.add_argument("--data-seed", type=int, default=0, help="seed of the records (see generate_persons)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
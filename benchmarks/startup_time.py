@@ -0,0 +1,126 @@
+"""
+Cold start time of the service, with telemetry disabled and enabled.
+
+For each case and run, in a fresh process:
+  import_s         time to import main.py (modules, configuration, application setup)
+  first_request_s  time from starting uvicorn until the first GET /person/unzr/{unzr}
+                   is answered with 200: interpreter start, imports, startup events
+                   (database connection) and the request itself
+The service uses a temporary SQLite database like load_test. With telemetry enabled the
+spans are exported to the default endpoint; no collector needs to run there.
+The report is JSON with the median and minimum of every value; save it with --output
+to compare releases. --importtime also prints the slowest modules to import.
+
+Usage:
+    python -m benchmarks.startup_time [--runs 5] [--importtime] [--output startup.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.generate_persons import PersonGenerator
+from benchmarks.load_test import ROOT, create_database, free_port, git_commit, server_env, start_server
+
+SEED_ROWS = 100
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def measure_import(env: dict) -> float:
+    result = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+# Modules with the largest cumulative import time, as reported by python -X importtime
+def slowest_imports(env: dict, count: int) -> list:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative), name.rstrip()))
+    modules.sort(reverse=True)
+    return [{"module": name.strip(), "depth": (len(name) - len(name.lstrip())) // 2, "cumulative_ms": us / 1000}
+            for us, name in modules[:count]]
+
+
+async def measure_first_request(db_path: str, unzr: str, telemetry: bool, timeout: float = 60.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = start_server(db_path, port, 1, False, telemetry)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            while time.perf_counter() - started < timeout:
+                if server.poll() is not None:
+                    raise SystemExit(f"Server exited with code {server.returncode}")
+                try:
+                    if (await client.get(f"/person/unzr/{unzr}")).status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.01)
+        raise SystemExit("Server did not answer in time")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def summary(values: list) -> dict:
+    return {"median": round(statistics.median(values), 4), "min": round(min(values), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="measurements per case")
+    parser.add_argument("--importtime", action="store_true", help="also report the slowest modules to import")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    generator = PersonGenerator(0)
+    cases = {}
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "person.db")
+        create_database(db_path, generator, SEED_ROWS)
+        unzr = generator.person(0)["unzr"]
+
+        for name, telemetry in (("telemetry_off", False), ("telemetry_on", True)):
+            env = server_env(db_path, telemetry=telemetry)
+            imports = [measure_import(env) for _ in range(args.runs)]
+            first_requests = [asyncio.run(measure_first_request(db_path, unzr, telemetry)) for _ in range(args.runs)]
+            cases[name] = {"import_s": summary(imports), "first_request_s": summary(first_requests)}
+            if args.importtime:
+                cases[name]["slowest_imports"] = slowest_imports(env, 15)
+            print(f"{name}: import {cases[name]['import_s']['median']} s, "
+                  f"first request {cases[name]['first_request_s']['median']} s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "runs": args.runs,
+        },
+        "cases": cases,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -40,7 +40,11 @@ ALTER TABLE `person`
   ADD PRIMARY KEY (`id`),
   ADD UNIQUE KEY `passportNumber` (`passportNumber`),
   ADD UNIQUE KEY `unzr` (`unzr`),
-  ADD UNIQUE KEY `ix_person_rnokpp` (`rnokpp`);
+  ADD UNIQUE KEY `ix_person_rnokpp` (`rnokpp`),
+  ADD KEY `ix_person_surname_name` (`surname`,`name`),
+  ADD KEY `ix_person_name` (`name`),
+  ADD KEY `ix_person_patronym` (`patronym`),
+  ADD KEY `ix_person_dateOfBirth` (`dateOfBirth`);
 
 --
 --
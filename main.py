@@ -1,27 +1,48 @@
-from fastapi import FastAPI, Request, HTTPException, Depends, Header
+from fastapi import FastAPI, HTTPException, Depends, Header, Query
 import databases
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 import models.person
 import logging
+from typing import List
 from utils.get_all_persons import get_all_persons_from_db
-from utils.create_person import create_person_in_db
+from utils.create_person import create_person_in_db, create_persons_in_db
 from utils.update_person import update_person_in_db
 from utils.delete_person import delete_person_in_db
 from utils.get_person import get_person_by_params_from_db
+from utils.search_persons import search_persons_in_db
+from utils.export_persons import export_persons_from_db, EXPORT_FORMATS
+from utils.responses import person_response
 from pydantic import ValidationError
 from utils.config_utils import (
     load_config,
     get_database_url,
+    get_database_options,
+    get_read_coalescing,
+    load_replica_settings,
     configure_logging,
     load_telemetry_settings,
     configure_telemetry,
-    instrument_app_with_telemetry)
+    instrument_app_with_telemetry,
+    load_cache_settings,
+    load_compression_settings,
+    load_metrics_settings,
+    load_admission_settings,
+    get_config_param)
 import utils.validation
 from utils import definitions
+from utils.person_cache import person_cache
+from utils.single_flight import read_flights
+from utils.database import get_pool_stats, ReadReplicaRouter
+from utils.xroad_context import XRoadContextMiddleware
+from utils.compression import CompressionMiddleware
+from utils.metrics import MetricsMiddleware, metrics_response
+from utils.admission import AdmissionControlMiddleware
+from utils.tracing import set_db_system
 
 # This service is part of the training materials for developers working with the "X-Road" system.
-# As an example, the service logs all HTTP headers received with each request.
-# In production-grade services, only official "X-Road" headers should be logged.
+# As an example, the service logs all HTTP headers received with each request (see XRoadContextMiddleware).
+# In production-grade services, only official "X-Road" headers should be logged: set "headers = xroad"
+# in the [logging] section of config.ini.
 
 
 # Load configuration
@@ -34,74 +55,134 @@ try:
     telemetry_settings = load_telemetry_settings(config)
     configure_telemetry(telemetry_settings)
 
+    person_cache.configure(load_cache_settings(config))
+
+    header_log_mode = get_config_param(config, 'logging', 'headers', 'LOG_HEADERS', default="all").strip().lower()
+    compression_settings = load_compression_settings(config)
+    metrics_settings = load_metrics_settings(config)
+    admission_settings = load_admission_settings(config)
+
     logger = logging.getLogger(__name__)
     logger.info("Configuration loaded")
 
 
     # Get the database URL
     SQLALCHEMY_DATABASE_URL = get_database_url(config)
+    DATABASE_OPTIONS = get_database_options(config)
+    replica_settings = load_replica_settings(config)
+    read_flights.enabled = get_read_coalescing(config)
 except ValueError as e:
     logging.critical(f"Failed to load configuration: {e}")
     exit(1)
 
 # Create the database object that will be used for executing queries
-database = databases.Database(SQLALCHEMY_DATABASE_URL)
+database = databases.Database(SQLALCHEMY_DATABASE_URL, **DATABASE_OPTIONS)
+# Database spans report the database type in "db.system", like person_statements() picks the dialect
+set_db_system(database.url.dialect)
+
+# Read queries go through the router: to a read replica if any are configured, otherwise to the primary
+read_database = ReadReplicaRouter(
+    database,
+    [databases.Database(url, **DATABASE_OPTIONS) for url in replica_settings.urls],
+    sticky_seconds=replica_settings.sticky_seconds,
+    retry_interval=replica_settings.retry_interval,
+)
 
 app = FastAPI()
+if admission_settings.enabled:
+    # Innermost, so rejected requests are still logged and counted by the middlewares below
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        routes=app.routes,
+        settings=admission_settings,
+        path_prefix="/person",
+        read_routes=("POST /person/search",),
+    )
+app.add_middleware(XRoadContextMiddleware, log_headers=header_log_mode)
+if compression_settings.enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        algorithms=compression_settings.algorithms,
+        min_size=compression_settings.min_size,
+        levels=compression_settings.levels,
+    )
+
+
+# Usage of the connection pools of this worker, reported in the db_pool_connections metric
+def pool_stats_by_database() -> dict:
+    pools = {"primary": get_pool_stats(database)}
+    for replica in read_database.replicas:
+        pools[replica.url.hostname] = get_pool_stats(replica)
+    return pools
+
+
+if metrics_settings.enabled:
+    app.add_middleware(
+        MetricsMiddleware,
+        routes=app.routes,
+        metrics_path=metrics_settings.path,
+        pool_stats=pool_stats_by_database,
+    )
+    app.add_api_route(metrics_settings.path, metrics_response, methods=["GET"], include_in_schema=False)
+
 try:
     instrument_app_with_telemetry(app, telemetry_settings)
 except Exception as e:
     logger.error(f"Error while loading instrument_app_with_telemetry: {e}")
 
 
+# Called after every write of a request handler
+def record_write() -> None:
+    # Reads of this client go to the primary for a while (read replicas may lag behind)
+    read_database.record_write()
+    # Later reads must not share a query that may have run before the write
+    read_flights.forget()
+
+
 @app.on_event("startup")
 async def startup():
     # On startup, connect to the database
     await database.connect()
+    await read_database.connect()
+    await person_cache.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
     # On shutdown, disconnect from the database
+    await person_cache.stop()
+    await read_database.disconnect()
     await database.disconnect()
 
 
-@app.get("/person")  # Get data about all persons in the database
-async def person_get_all(request: Request, queryId: str = None, userId: str = None):
+@app.get("/person")  # Get data about all persons in the database, one page at a time
+async def person_get_all(limit: int = Query(definitions.default_page_limit, ge=1, le=definitions.max_page_limit),
+                         after: str = None, accept: str = Header(None)):
     logger.debug("Start handling GET /person request")
 
-    # Log all headers
-    headers = dict(request.headers)
-    logger.info("Request headers:")
-    for header_key, header_value in headers.items():
-        logger.info(f"    {header_key}: {header_value}")
+    result, next_cursor = await get_all_persons_from_db(read_database, limit, after)
+    logger.debug("GET /person request handled")
+    return person_response({"message": result, "next": next_cursor}, accept)
 
-    # Log additional Trembita parameters
-    if queryId:
-        logger.info(f"Query parameter 'queryId': {queryId}")
-    if userId:
-        logger.info(f"Query parameter 'userId': {userId}")
 
-    result = await get_all_persons_from_db(database)
-    logger.debug("GET /person request handled")
-    return {"message": result}
+@app.get("/person/export")  # Stream all persons in the database as NDJSON or CSV
+async def person_export(format: str = "ndjson"):
+    logger.debug("Start handling GET /person/export?format=" + str(format))
 
+    if format not in EXPORT_FORMATS:
+        logger.warning("Unsupported export format: %s", format)
+        raise HTTPException(status_code=400, detail="Unsupported export format, use one of: " + ", ".join(EXPORT_FORMATS))
 
-@app.get("/person/{param}/{value}")  # Search person data by one parameter
-async def person_get_by_parameter(param: str, value: str, request: Request, queryId: str = None, userId: str = None):
-    logger.debug("Start handling GET /person/" + str(param) + "/" + str(value))
+    return StreamingResponse(
+        export_persons_from_db(read_database, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename=person.{format}"},
+    )
 
-    # Log all headers
-    headers = dict(request.headers)
-    logger.info("Request headers:")
-    for header_key, header_value in headers.items():
-        logger.info(f"    {header_key}: {header_value}")
 
-    # Log additional Trembita parameters
-    if queryId:
-        logger.info(f"Query parameter 'queryId': {queryId}")
-    if userId:
-        logger.info(f"Query parameter 'userId': {userId}")
+@app.get("/person/{param}/{value}")  # Search person data by one parameter
+async def person_get_by_parameter(param: str, value: str, accept: str = Header(None)):
+    logger.debug("Start handling GET /person/" + str(param) + "/" + str(value))
 
     if not param.strip() or not value.strip():
         logger.warning("One of the parameters is missing a value")
@@ -113,49 +194,55 @@ async def person_get_by_parameter(param: str, value: str, request: Request, quer
         raise HTTPException(status_code=400, detail=str(e))
 
     search_dict = {param: value}
-    result = await get_person_by_params_from_db(search_dict, database)
-    return {"message": result}
+    result = await get_person_by_params_from_db(search_dict, read_database)
+    return person_response({"message": result}, accept)
 
 
-@app.post("/person")  # Create a new person record
-async def person_post(request: Request, person: models.person.PersonCreate, queryId: str = None, userId: str = None):
-    logger.debug("Start handling POST /person/ " + str(person))
+@app.post("/person/search")  # Search person data by several parameters and lists of unique keys
+async def person_search(search: models.person.PersonSearch,
+                        limit: int = Query(definitions.max_page_limit, ge=1, le=definitions.max_page_limit),
+                        after: str = None, accept: str = Header(None)):
+    logger.debug("Start handling POST /person/search " + str(search))
 
-    # Log all headers
-    headers = dict(request.headers)
-    logger.info("Request headers:")
-    for header_key, header_value in headers.items():
-        logger.info(f"    {header_key}: {header_value}")
+    result, next_cursor = await search_persons_in_db(search.dict(exclude_none=True), read_database, limit, after)
+    logger.debug("POST /person/search request handled")
+    return person_response({"message": result, "next": next_cursor}, accept)
 
-    # Log additional Trembita parameters
-    if queryId:
-        logger.info(f"Query parameter 'queryId': {queryId}")
-    if userId:
-        logger.info(f"Query parameter 'userId': {userId}")
+
+@app.post("/person")  # Create a new person record
+async def person_post(person: models.person.PersonCreate):
+    logger.debug("Start handling POST /person/ " + str(person))
 
     result = await create_person_in_db(dict(person), database)
+    record_write()
     logger.debug("POST /person request handled")
     return {"message": result}
 
 
-@app.put("/person")  # Update an existing person record
-async def person_update(request: Request, person: models.person.PersonUpdate, queryId: str = None, userId: str = None):
-    logger.debug("Start handling PUT /person/ " + str(person))
+@app.post("/person/batch")  # Create many person records in one request
+async def person_post_batch(persons: List[models.person.PersonCreate]):
+    logger.debug("Start handling POST /person/batch with " + str(len(persons)) + " records")
+
+    if not persons:
+        logger.warning("Empty batch received")
+        raise HTTPException(status_code=422, detail="Batch must contain at least one record")
+    if len(persons) > definitions.max_batch_items:
+        logger.warning("Batch of %d records exceeds the limit of %d", len(persons), definitions.max_batch_items)
+        raise HTTPException(status_code=422, detail=f"Batch must contain at most {definitions.max_batch_items} records")
+
+    result = await create_persons_in_db([dict(person) for person in persons], database)
+    record_write()
+    logger.debug("POST /person/batch request handled")
+    return {"message": result}
 
-    # Log all headers
-    headers = dict(request.headers)
-    logger.info("Request headers:")
-    for header_key, header_value in headers.items():
-        logger.info(f"    {header_key}: {header_value}")
 
-    # Log additional Trembita parameters
-    if queryId:
-        logger.info(f"Query parameter 'queryId': {queryId}")
-    if userId:
-        logger.info(f"Query parameter 'userId': {userId}")
+@app.put("/person")  # Update an existing person record
+async def person_update(person: models.person.PersonUpdate):
+    logger.debug("Start handling PUT /person/ " + str(person))
 
     update_data = person.dict(exclude_none=True)
     result = await update_person_in_db(update_data, database)
+    record_write()
     logger.debug("PUT /person request handled")
     if result == 0:
         # No data was updated
@@ -164,21 +251,9 @@ async def person_update(request: Request, person: models.person.PersonUpdate, qu
 
 
 @app.delete("/person/{param}/{value}")  # Delete a person record using UNZR
-async def person_delete(param: str, value: str, request: Request, queryId: str = None, userId: str = None):
+async def person_delete(param: str, value: str):
     logger.debug("Start handling DELETE /person/" + str(param) + "/" + str(value))
 
-    # Log all headers
-    headers = dict(request.headers)
-    logger.info("Request headers:")
-    for header_key, header_value in headers.items():
-        logger.info(f"    {header_key}: {header_value}")
-
-    # Log additional Trembita parameters
-    if queryId:
-        logger.info(f"Query parameter 'queryId': {queryId}")
-    if userId:
-        logger.info(f"Query parameter 'userId': {userId}")
-
     if not param.strip() or not value.strip():
         logger.warning("One of the parameters is missing a value")
         raise HTTPException(status_code=422, detail="Search parameter is missing in request")
@@ -190,8 +265,19 @@ async def person_delete(param: str, value: str, request: Request, queryId: str =
 
     delete_person = {param: value}
     result = await delete_person_in_db(delete_person, database)
+    record_write()
     logger.debug("DELETE /person/" + str(param) + "/" + str(value) + " request handled")
     if result == 0:
         # No data was deleted
         return Response(status_code=204)
-    return {"message": "Person deleted successfully"}
\ No newline at end of file
+    return {"message": "Person deleted successfully"}
+
+
+@app.get("/status/db-pool")  # Usage of the database connection pool of this worker
+async def status_db_pool():
+    stats = get_pool_stats(database)
+    if stats is None:
+        raise HTTPException(status_code=503, detail="Database connection pool is not available")
+    if read_database.replicas:
+        stats["replicas"] = read_database.replica_status()
+    return {"message": stats}
@@ -0,0 +1,42 @@
+"""Create person table
+
+Revision ID: 4a7d2c91e0b3
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a7d2c91e0b3'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('person',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=128), nullable=False),
+    sa.Column('surname', sa.String(length=128), nullable=False),
+    sa.Column('patronym', sa.String(length=128), nullable=True),
+    sa.Column('dateOfBirth', sa.Date(), nullable=False),
+    sa.Column('gender', sa.Enum('male', 'female', name='genderenum'), nullable=False),
+    sa.Column('rnokpp', sa.String(length=10), nullable=False),
+    sa.Column('passportNumber', sa.String(length=9), nullable=False),
+    sa.Column('unzr', sa.String(length=14), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('passportNumber'),
+    sa.UniqueConstraint('unzr')
+    )
+    op.create_index(op.f('ix_person_rnokpp'), 'person', ['rnokpp'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_person_rnokpp'), table_name='person')
+    op.drop_table('person')
+    sa.Enum(name='genderenum').drop(op.get_bind(), checkfirst=True)
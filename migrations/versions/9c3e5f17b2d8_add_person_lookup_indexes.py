@@ -0,0 +1,32 @@
+"""Add person lookup indexes
+
+Revision ID: 9c3e5f17b2d8
+Revises: 4a7d2c91e0b3
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5f17b2d8'
+down_revision: Union[str, None] = '4a7d2c91e0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_person_surname_name', 'person', ['surname', 'name'], unique=False)
+    op.create_index('ix_person_name', 'person', ['name'], unique=False)
+    op.create_index('ix_person_patronym', 'person', ['patronym'], unique=False)
+    op.create_index('ix_person_dateOfBirth', 'person', ['dateOfBirth'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_person_dateOfBirth', table_name='person')
+    op.drop_index('ix_person_patronym', table_name='person')
+    op.drop_index('ix_person_name', table_name='person')
+    op.drop_index('ix_person_surname_name', table_name='person')
@@ -3,7 +3,7 @@ import sqlalchemy
 
 from pydantic import BaseModel, Field, validator, ValidationError
 from datetime import date, datetime
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, List
 import re
 
 from utils import definitions
@@ -27,8 +27,51 @@ person_table = sqlalchemy.Table(
     sqlalchemy.Column("rnokpp", sqlalchemy.String(definitions.rnokpp_len), unique=True, nullable=False, index=True),
     sqlalchemy.Column("passportNumber", sqlalchemy.String(definitions.passport_number_len), unique=True, nullable=False),
     sqlalchemy.Column("unzr", sqlalchemy.String(definitions.unzr_len), unique=True, nullable=False),
+    # Secondary indexes for GET /person/{param}/{value} lookups on non-unique columns.
+    # (surname, name) also serves lookups by surname alone. gender is not indexed:
+    # with two values a full scan is cheaper than reading half the table through an index.
+    sqlalchemy.Index("ix_person_surname_name", "surname", "name"),
+    sqlalchemy.Index("ix_person_name", "name"),
+    sqlalchemy.Index("ix_person_patronym", "patronym"),
+    sqlalchemy.Index("ix_person_dateOfBirth", "dateOfBirth"),
 )
 
+# Patterns used by the validators, compiled once at import
+UNZR_PATTERN = re.compile(r'^\d{8}-\d{5}$')
+OLD_PASSPORT_PATTERN = re.compile(r'^[А-Я]{2} \d{6}$')
+
+
+# UNZR check shared by the models that have a "unzr" field
+def check_unzr(value):
+    # Format check
+    if not UNZR_PATTERN.match(value):
+        raise ValueError('UNZR must be in the format YYYYMMDD-XXXXC')
+
+    # Split into parts
+    date_part, code_part = value.split('-')
+    year = int(date_part[:4])
+    month = int(date_part[4:6])
+    day = int(date_part[6:])
+
+    # Date validity check
+    try:
+        datetime(year, month, day)
+    except ValueError:
+        raise ValueError('Invalid date in UNZR')
+
+    # Code validity check
+    code = int(code_part[:4])
+    if not (0 <= code <= 9999):
+        raise ValueError('Code in UNZR must be in the range from 0000 to 9999')
+
+    # Control digit check
+    control_digit = int(code_part[4])
+    if not (0 <= control_digit <= 9):
+        raise ValueError('Last symbol of UNZR is not a digit 0..9')
+
+    return value
+
+
 # Data model used for validating request data
 class PersonMainModel(BaseModel):
     name: str = Field(min_length=1, max_length=definitions.name_len)
@@ -71,7 +114,7 @@ class PersonMainModel(BaseModel):
             return value
 
         # Check for old format passport: AA 123456 (Cyrillic letters)
-        if re.match(r'^[А-Я]{2} \d{6}$', value):
+        if OLD_PASSPORT_PATTERN.match(value):
             return value
 
         # If neither format matches, raise error
@@ -81,33 +124,7 @@ class PersonMainModel(BaseModel):
 
     @validator('unzr')
     def validate_unzr(cls, value):
-        # Format check
-        if not re.match(r'^\d{8}-\d{5}$', value):
-            raise ValueError('UNZR must be in the format YYYYMMDD-XXXXC')
-
-        # Split into parts
-        date_part, code_part = value.split('-')
-        year = int(date_part[:4])
-        month = int(date_part[4:6])
-        day = int(date_part[6:])
-
-        # Date validity check
-        try:
-            datetime(year, month, day)
-        except ValueError:
-            raise ValueError('Invalid date in UNZR')
-
-        # Code validity check
-        code = int(code_part[:4])
-        if not (0 <= code <= 9999):
-            raise ValueError('Code in UNZR must be in the range from 0000 to 9999')
-
-        # Control digit check
-        control_digit = int(code_part[4])
-        if not (0 <= control_digit <= 9):
-            raise ValueError('Last symbol of UNZR is not a digit 0..9')
-
-        return value
+        return check_unzr(value)
 
 
 class PersonCreate(PersonMainModel):
@@ -123,33 +140,7 @@ class PersonDelete(BaseModel):
 
     @validator('unzr')
     def validate_unzr(cls, value):
-        # Format check
-        if not re.match(r'^\d{8}-\d{5}$', value):
-            raise ValueError('UNZR must be in the format YYYYMMDD-XXXXC')
-
-        # Split into parts
-        date_part, code_part = value.split('-')
-        year = int(date_part[:4])
-        month = int(date_part[4:6])
-        day = int(date_part[6:])
-
-        # Date validity check
-        try:
-            datetime(year, month, day)
-        except ValueError:
-            raise ValueError('Invalid date in UNZR')
-
-        # Code validity check
-        code = int(code_part[:4])
-        if not (0 <= code <= 9999):
-            raise ValueError('Code in UNZR must be in the range from 0000 to 9999')
-
-        # Control digit check
-        control_digit = int(code_part[4])
-        if not (0 <= control_digit <= 9):
-            raise ValueError('Last symbol of UNZR is not a digit 0..9')
-
-        return value
+        return check_unzr(value)
 
 
 class PersonGet(PersonMainModel):
@@ -160,4 +151,25 @@ class PersonGet(PersonMainModel):
     gender: Optional[str] = Field(None, max_length=128)
     rnokpp: Optional[str] = Field(None, max_length=definitions.rnokpp_len)
     passportNumber: Optional[str] = Field(None, max_length=definitions.passport_number_len)
-    unzr: Optional[str] = Field(None, max_length=definitions.unzr_len)
\ No newline at end of file
+    unzr: Optional[str] = Field(None, max_length=definitions.unzr_len)
+
+
+# Search by several fields (POST /person/search).
+# Single-value fields are combined with AND; the *_in lists match any of the given
+# values of a unique key and are validated item by item like the single-value fields.
+class PersonSearch(PersonGet):
+    rnokpp_in: Optional[List[str]] = Field(None, min_length=1, max_length=definitions.max_search_keys)
+    passportNumber_in: Optional[List[str]] = Field(None, min_length=1, max_length=definitions.max_search_keys)
+    unzr_in: Optional[List[str]] = Field(None, min_length=1, max_length=definitions.max_search_keys)
+
+    @validator('rnokpp_in', each_item=True)
+    def validate_rnokpp_in(cls, value):
+        return cls.validate_rnokpp(value)
+
+    @validator('passportNumber_in', each_item=True)
+    def validate_pasport_num_in(cls, value):
+        return cls.validate_pasport_num(value)
+
+    @validator('unzr_in', each_item=True)
+    def validate_unzr_in(cls, value):
+        return check_unzr(value)
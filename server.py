@@ -0,0 +1,233 @@
+import logging
+import math
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import random
+from typing import Optional
+
+import uvicorn
+
+from uvicorn_config import config as server_config
+
+# Production entry point: "python server.py".
+# A supervisor process binds the listening socket, imports the application once (preload)
+# and forks the uvicorn worker processes, which share the socket. Workers that exit are
+# replaced: after max_requests requests, above max_worker_memory_mb of memory, or after a
+# crash. SIGTERM or SIGINT stops the workers gracefully. Settings: uvicorn_config.py.
+
+logger = logging.getLogger("uvicorn.error")
+
+# A worker that fails this soon after it was started is a startup error: it is not
+# restarted (it would fail again) and the whole server stops
+BOOT_TIMEOUT = 10
+# Interval of the supervisor loop, in seconds
+POLL_INTERVAL = 0.5
+# Time a worker has to exit after graceful_timeout before it is killed
+KILL_DELAY = 5
+
+
+# CPU quota of the cgroup of this process in CPUs (e.g. 1.5), None if there is no limit
+def cgroup_cpu_quota() -> Optional[float]:
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    # cgroup v1: a quota of -1 means no limit
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+# Number of CPUs this process can use: the smaller of the CPUs it may run on and the
+# cgroup quota rounded up, so a container limited to 1.5 CPUs gets 2 workers
+def available_cpus() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def resolve_workers(value) -> int:
+    if str(value).strip().lower() == "auto":
+        return available_cpus()
+    return max(1, int(value))
+
+
+# Resident memory of this process in bytes, None where /proc is not available
+def resident_memory() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# uvicorn server of one worker that also stops when the worker's memory exceeds max_memory
+# bytes; it finishes its requests like on SIGTERM and the supervisor starts a new worker
+class WorkerServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, max_memory: int = 0):
+        super().__init__(config)
+        self.max_memory = max_memory
+
+    async def on_tick(self, counter: int) -> bool:
+        # About once per second
+        if self.max_memory and counter % 10 == 0:
+            memory = resident_memory()
+            if memory is not None and memory > self.max_memory:
+                logger.info("Memory limit of %d MiB exceeded (%d MiB). Terminating process.",
+                            self.max_memory >> 20, memory >> 20)
+                return True
+        return await super().on_tick(counter)
+
+
+class Supervisor:
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.workers = resolve_workers(settings["workers"])
+        self.children = {}  # pid -> start time
+        self.stopping = False
+        self.stop_deadline = None
+        self.failed = False
+        self.metrics_dir = None
+        self.own_metrics_dir = False
+        self.pid = os.getpid()
+
+    def run(self) -> int:
+        try:
+            self._prepare_metrics_dir()
+            # Read by get_database_options to split the connection pool budget between the workers
+            os.environ["WEB_CONCURRENCY"] = str(self.workers)
+
+            self.config = uvicorn.Config(
+                "main:app",
+                host=self.settings["host"],
+                port=self.settings["port"],
+                log_level=self.settings["log_level"],
+                timeout_graceful_shutdown=self.settings["graceful_timeout"],
+            )
+            if self.settings["preload"]:
+                self.config.load()
+            self.socket = self.config.bind_socket()
+
+            signal.signal(signal.SIGTERM, self._handle_stop)
+            signal.signal(signal.SIGINT, self._handle_stop)
+
+            logger.info("Starting %d workers (preload=%s, max_requests=%s, max_worker_memory_mb=%s)",
+                        self.workers, self.settings["preload"], self.settings["max_requests"],
+                        self.settings["max_worker_memory_mb"])
+            for _ in range(self.workers):
+                self._spawn()
+
+            while self.children:
+                self._reap()
+                if self.stopping:
+                    if time.monotonic() > self.stop_deadline:
+                        self._signal_children(signal.SIGKILL)
+                else:
+                    for _ in range(self.workers - len(self.children)):
+                        self._spawn()
+                time.sleep(POLL_INTERVAL)
+
+            logger.info("All workers stopped")
+            return 1 if self.failed else 0
+        finally:
+            # Forked workers leave through sys.exit() as well; only the supervisor cleans up
+            if os.getpid() == self.pid and self.own_metrics_dir:
+                shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    # With several worker processes the Prometheus metrics are kept in PROMETHEUS_MULTIPROC_DIR
+    # (see utils/metrics.py). It must be set before the application is imported and must not
+    # contain files of a previous run. A temporary directory is used if it is not set.
+    def _prepare_metrics_dir(self) -> None:
+        path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for name in os.listdir(path):
+                if name.endswith(".db"):
+                    os.remove(os.path.join(path, name))
+        elif self.workers > 1 or self.settings["max_requests"] or self.settings["max_worker_memory_mb"]:
+            path = tempfile.mkdtemp(prefix="prometheus-")
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+            self.own_metrics_dir = True
+        self.metrics_dir = path
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+
+        # Worker process: uvicorn installs its own handlers for a graceful shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        max_requests = self.settings["max_requests"]
+        if max_requests:
+            self.config.limit_max_requests = max_requests + random.randint(0, self.settings["max_requests_jitter"])
+        server = WorkerServer(self.config, self.settings["max_worker_memory_mb"] << 20)
+        server.run(sockets=[self.socket])
+        sys.exit(0)
+
+    def _reap(self) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+            if self.metrics_dir:
+                from prometheus_client import multiprocess
+                multiprocess.mark_process_dead(pid)
+
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                logger.info("Worker %d stopped", pid)
+            elif code != 0 and time.monotonic() - started < BOOT_TIMEOUT:
+                logger.error("Worker %d failed to start (exit code %d), stopping", pid, code)
+                self.failed = True
+                self._stop()
+            else:
+                logger.info("Worker %d exited (exit code %d), starting a new one", pid, code)
+
+    def _handle_stop(self, signum, frame) -> None:
+        logger.info("Received %s, stopping workers", signal.Signals(signum).name)
+        self._stop()
+
+    def _stop(self) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        self.stop_deadline = time.monotonic() + self.settings["graceful_timeout"] + KILL_DELAY
+        self._signal_children(signal.SIGTERM)
+
+    def _signal_children(self, signum) -> None:
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+
+if __name__ == "__main__":
+    sys.exit(Supervisor(server_config).run())
@@ -0,0 +1,155 @@
+import asyncio
+import collections
+import logging
+import time
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+from utils.metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_SHED
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# Methods whose requests use the read budget; all others use the write budget
+READ_METHODS = ("GET", "HEAD")
+
+
+# Concurrency limit with a bounded FIFO wait queue.
+# acquire() returns at once when fewer than "limit" requests hold the limiter. Otherwise the
+# request waits in the queue until a slot is released or the deadline passes; when the queue
+# already holds queue_size requests it is rejected without waiting. A released slot is handed
+# straight to the first waiter, so late arrivals cannot overtake the queue.
+class Limiter:
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.active = 0
+        self._waiters = collections.deque()
+        self._depth = ADMISSION_QUEUE_DEPTH.labels(name)
+
+    # Returns None when admitted, otherwise the reason for the rejection: "queue_full" or "timeout"
+    async def acquire(self, deadline: float) -> Optional[str]:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            return "timeout"
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        # The result is True when a slot was handed over, False when the deadline passed
+        timer = loop.call_later(timeout, _expire, waiter)
+        self._waiters.append(waiter)
+        self._depth.inc()
+        try:
+            admitted = await waiter
+        except asyncio.CancelledError:
+            # Client disconnected or server stopping: pass on a slot that was already handed over
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._depth.dec()
+        return None if admitted else "timeout"
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            self._depth.dec()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+
+def _expire(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(False)
+
+
+# ASGI middleware that limits the number of requests handled at the same time, so that
+# under a slow database requests wait here, for a bounded time, instead of in the
+# connection pool until the X-Road security server gives up on them.
+# Every limited request needs a slot of the read or write budget (settings.read_* /
+# settings.write_*); routes listed in settings.route_limits ("GET /person/export") also
+# need a slot of their own limiter, which has the queue size of their budget. Requests that
+# do not get their slots within the queue timeout of their budget, or find a queue full,
+# get 503 with Retry-After.
+# Only routes of "routes" (the application's route list) under path_prefix are limited, so
+# status, metrics and documentation stay available under load. read_routes lists routes of
+# other methods that only read ("POST /person/search").
+class AdmissionControlMiddleware:
+    def __init__(self, app, routes: list, settings, path_prefix: str = "/", read_routes: tuple = ()):
+        self.app = app
+        self.retry_after = str(max(1, settings.retry_after))
+        budgets = {
+            "read": (settings.read_concurrency, settings.read_queue, settings.read_queue_timeout),
+            "write": (settings.write_concurrency, settings.write_queue, settings.write_queue_timeout),
+        }
+        budget_limiters = {name: Limiter(name, limit, queue_size) for name, (limit, queue_size, _) in budgets.items()}
+
+        # (route, method, limiters in the order they are acquired, queue timeout)
+        self.routes = []
+        for route in routes:
+            if not isinstance(route, APIRoute) or not route.path.startswith(path_prefix):
+                continue
+            for method in sorted(route.methods or ()):
+                key = f"{method} {route.path}"
+                budget = "read" if method in READ_METHODS or key in read_routes else "write"
+                _, queue_size, timeout = budgets[budget]
+                limiters = [budget_limiters[budget]]
+                if key in settings.route_limits:
+                    # A request waits for its route first, so it does not hold a budget slot meanwhile
+                    limiters.insert(0, Limiter(key, settings.route_limits[key], queue_size))
+                self.routes.append((route, method, limiters, timeout))
+
+        unknown = set(settings.route_limits) - {f"{method} {route.path}" for route, method, _, _ in self.routes}
+        for key in sorted(unknown):
+            logger.warning("Admission control: route_limits entry '%s' matches no route", key)
+
+    def _match(self, scope):
+        for route, method, limiters, timeout in self.routes:
+            if method != scope["method"]:
+                continue
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return limiters, timeout
+        return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limiters, timeout = self._match(scope)
+        if limiters is None:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = time.monotonic() + timeout
+        acquired = []
+        try:
+            for limiter in limiters:
+                reason = await limiter.acquire(deadline)
+                if reason is not None:
+                    ADMISSION_SHED.labels(limiter.name, reason).inc()
+                    logger.debug("Request %s %s rejected by limiter '%s': %s",
+                                 scope["method"], scope["path"], limiter.name, reason)
+                    response = JSONResponse({"detail": "Service is overloaded, try again later"},
+                                            status_code=503, headers={"Retry-After": self.retry_after})
+                    await response(scope, receive, send)
+                    return
+                acquired.append(limiter)
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
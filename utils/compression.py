@@ -0,0 +1,174 @@
+import logging
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# brotli and zstd are optional: they are used only if their package is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Streaming compressors with the same interface: compress() returns the compressed bytes
+# of "data" and flushes them, so every chunk of a streamed response can be decoded as
+# soon as it arrives; final=True also closes the stream.
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.compress(data)
+        if final:
+            return output + self._compressor.flush()
+        return output + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+# Content codings the middleware can produce: compressor class and whether it is installed
+COMPRESSORS = {
+    "gzip": (_GzipCompressor, True),
+    "br": (_BrotliCompressor, brotli is not None),
+    "zstd": (_ZstdCompressor, zstandard is not None),
+}
+
+# Default level of every algorithm: fast settings that still shrink JSON several times
+DEFAULT_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+
+
+# Parses an Accept-Encoding header into {coding: quality}
+def _accepted_encodings(header: str) -> dict:
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        coding = coding.strip().lower()
+        if coding:
+            accepted[coding] = quality
+    return accepted
+
+
+# ASGI middleware that compresses response bodies with gzip, brotli ("br") or zstd.
+# The coding is the first of "algorithms" (server preference) that the client accepts.
+# A response sent in one piece is compressed only if it has at least min_size bytes, so
+# small single-person lookups skip the CPU cost. A streamed response (e.g. GET /person/export)
+# is always compressed, chunk by chunk, without buffering it.
+class CompressionMiddleware:
+    def __init__(self, app, algorithms: list, min_size: int = 1024, levels: dict = None):
+        self.app = app
+        self.min_size = min_size
+        self.levels = levels or {}
+        self.algorithms = []
+        for algorithm in algorithms:
+            if algorithm not in COMPRESSORS:
+                logger.warning("Unknown compression algorithm '%s' is ignored", algorithm)
+            elif not COMPRESSORS[algorithm][1]:
+                logger.warning("Compression algorithm '%s' is not installed and is ignored", algorithm)
+            else:
+                self.algorithms.append(algorithm)
+
+    def _choose(self, scope) -> Optional[str]:
+        header = Headers(scope=scope).get("accept-encoding")
+        if not header:
+            return None
+        accepted = _accepted_encodings(header)
+        for algorithm in self.algorithms:
+            if accepted.get(algorithm, accepted.get("*", 0)) > 0:
+                return algorithm
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.algorithms:
+            await self.app(scope, receive, send)
+            return
+
+        algorithm = self._choose(scope)
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                # Held back until the first body part shows whether and how to compress
+                start_message = dict(message, headers=list(message.get("headers", [])))
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if "content-encoding" in headers:
+                    # Already encoded by the handler: leave the response as it is
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                # The body depends on Accept-Encoding even when it is not compressed
+                headers.add_vary_header("Accept-Encoding")
+                if algorithm is None or (not more_body and len(body) < self.min_size):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor_class = COMPRESSORS[algorithm][0]
+                compressor = compressor_class(self.levels.get(algorithm, DEFAULT_LEVELS[algorithm]))
+                headers["Content-Encoding"] = algorithm
+                if more_body:
+                    # Streamed: the compressed length is not known in advance
+                    del headers["Content-Length"]
+                    await send(start_message)
+                else:
+                    body = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, compressing_send)
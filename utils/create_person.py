@@ -1,11 +1,17 @@
 from models.person import person_table as Person
 from fastapi import HTTPException
 import databases
-from sqlalchemy import insert, exc
+from sqlalchemy import insert, select, exc
 import logging
-import pymysql
 from opentelemetry import trace
 
+from utils import definitions
+from utils.database import INTEGRITY_ERRORS
+from utils.person_cache import person_cache
+from utils.statements import person_statements
+from utils.metrics import track_db_operation
+from utils.tracing import db_span
+
 # Create a logger instance
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
@@ -14,19 +20,17 @@ tracer = trace.get_tracer(__name__)
 async def create_person_in_db(person_data: dict, db: databases.Database):
     logger.info("Received data for creating a record in the database: %s", person_data)
 
-    query = insert(Person).values(person_data).returning(Person.c.id)
+    statement = person_statements(db).insert(tuple(person_data))
+    query = statement.bind(**person_data)
 
     try:
         # Create telemetry span for the DB operation
-        with tracer.start_as_current_span("DB: insert person") as span:
-            span.set_attribute("db.system", "mysql")
-            span.set_attribute("db.operation", "INSERT")
-            span.set_attribute("db.statement", str(query))  # careful with exposing raw SQL
-            span.set_attribute("db.table", Person.name)
-            span.set_attribute("app.layer", "database")
+        with db_span(tracer, "DB: insert person", "INSERT", statement.sql):
 
             # Execute the database insert query
-            record_id = await db.fetch_one(query)
+            with track_db_operation("INSERT", "create_person"):
+                record_id = await db.fetch_one(query)
+            await person_cache.invalidate(person_data)
             logger.info("Record created with ID: %s", str(record_id))
             return record_id
 
@@ -35,8 +39,8 @@ async def create_person_in_db(person_data: dict, db: databases.Database):
         logger.error("Data integrity error during record creation: %s", ie)
         raise HTTPException(status_code=400, detail="Data integrity error")
 
-    except pymysql.IntegrityError as pymyex:
-        # Data integrity violation errors from PyMySQL
+    except INTEGRITY_ERRORS as pymyex:
+        # Data integrity violation errors from the database driver
         logger.error("Data integrity error during record creation: %s", pymyex)
         raise HTTPException(status_code=400, detail="Data integrity error")
 
@@ -48,4 +52,98 @@ async def create_person_in_db(person_data: dict, db: databases.Database):
     except Exception as e:
         # Other general errors
         logger.error("Unknown error during record creation: %s", e)
-        raise HTTPException(status_code=500, detail="Unknown error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Unknown error")
+
+def _created(index: int, record_id: int) -> dict:
+    return {"index": index, "id": record_id}
+
+
+def _failed(index: int, detail: str) -> dict:
+    return {"index": index, "error": detail}
+
+
+# Insert rows one by one, each in its own transaction.
+# Used for a chunk whose multi-row INSERT hit a constraint, to find the offending rows.
+# Returns the results and whether the database is still usable: after any other error the
+# rest of the chunk is reported as failed and the caller stops.
+async def _create_chunk_row_by_row(chunk: list, first_index: int, db: databases.Database) -> tuple:
+    results = []
+    for offset, person_data in enumerate(chunk):
+        index = first_index + offset
+        try:
+            statement = person_statements(db).insert(tuple(person_data))
+            with track_db_operation("INSERT", "create_person"):
+                async with db.transaction():
+                    record_id = await db.fetch_one(statement.bind(**person_data))
+            await person_cache.invalidate(person_data)
+            results.append(_created(index, record_id["id"]))
+
+        except (exc.IntegrityError, *INTEGRITY_ERRORS) as ie:
+            logger.warning("Data integrity error for batch item %d: %s", index, ie)
+            results.append(_failed(index, "Data integrity error"))
+
+        except Exception as e:
+            logger.error("Error while inserting batch item %d: %s", index, e)
+            results.extend(_failed(rest, "Database error") for rest in range(index, first_index + len(chunk)))
+            return results, False
+
+    return results, True
+
+
+# Function to create many records in the database.
+# Rows are written in chunks of definitions.batch_chunk_rows: one multi-row INSERT per chunk,
+# inside one transaction. Returns one result per input item, in input order.
+async def create_persons_in_db(persons_data: list, db: databases.Database) -> list:
+    logger.info("Received %d records for batch creation in the database", len(persons_data))
+
+    results = []
+    for first_index in range(0, len(persons_data), definitions.batch_chunk_rows):
+        chunk = persons_data[first_index:first_index + definitions.batch_chunk_rows]
+        query = insert(Person).values(chunk)
+
+        try:
+            with db_span(tracer, "DB: insert persons batch", "INSERT", attributes={"db.rows": len(chunk)}):
+
+                with track_db_operation("INSERT", "create_persons_batch"):
+                    async with db.transaction():
+                        await db.execute(query)
+                        # Multi-row INSERT does not return ids, read them back by the unique UNZR
+                        unzrs = [person_data["unzr"] for person_data in chunk]
+                        rows = await db.fetch_all(
+                            select(Person.c.id, Person.c.unzr).where(Person.c.unzr.in_(unzrs))
+                        )
+
+            for person_data in chunk:
+                await person_cache.invalidate(person_data)
+
+            ids = {row["unzr"]: row["id"] for row in rows}
+            results.extend(
+                _created(first_index + offset, ids[person_data["unzr"]])
+                for offset, person_data in enumerate(chunk)
+            )
+
+        except (exc.IntegrityError, *INTEGRITY_ERRORS) as ie:
+            # The chunk was rolled back, retry it row by row to report the failing items
+            logger.warning("Data integrity error in batch chunk starting at item %d: %s", first_index, ie)
+            chunk_results, usable = await _create_chunk_row_by_row(chunk, first_index, db)
+            results.extend(chunk_results)
+            if not usable:
+                # Earlier chunks are committed: report them and the rest of the batch as failed
+                results.extend(
+                    _failed(index, "Database error")
+                    for index in range(first_index + len(chunk), len(persons_data))
+                )
+                break
+
+        except Exception as e:
+            # The database is not usable; report this chunk and the rest of the batch as failed
+            logger.error("Error while executing batch insert query: %s", e)
+            results.extend(
+                _failed(index, "Database error") for index in range(first_index, len(persons_data))
+            )
+            break
+
+    logger.info("Batch creation finished: %d created, %d failed",
+                sum(1 for result in results if "id" in result),
+                sum(1 for result in results if "error" in result))
+    return results
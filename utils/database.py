@@ -0,0 +1,179 @@
+import databases
+import logging
+import sqlite3
+import time
+from typing import Optional
+
+import pymysql
+
+from utils.xroad_context import current_xroad_context
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+
+def _integrity_errors() -> tuple:
+    # Integrity violation errors of every installed driver
+    errors = [pymysql.IntegrityError, sqlite3.IntegrityError]
+    try:
+        import asyncmy.errors
+        errors.append(asyncmy.errors.IntegrityError)
+    except ImportError:
+        pass
+    try:
+        import asyncpg.exceptions
+        errors.append(asyncpg.exceptions.IntegrityConstraintViolationError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+INTEGRITY_ERRORS = _integrity_errors()
+
+
+# Function to read the usage of the connection pool behind a databases.Database.
+# Returns None if the backend has no pool (e.g. SQLite) or the database is not connected.
+def get_pool_stats(db: databases.Database) -> Optional[dict]:
+    pool = getattr(db._backend, "_pool", None)
+    if pool is None:
+        return None
+
+    if hasattr(pool, "get_size"):
+        # asyncpg
+        size = pool.get_size()
+        idle = pool.get_idle_size()
+        min_size = pool.get_min_size()
+        max_size = pool.get_max_size()
+        waiting = None
+    elif hasattr(pool, "freesize"):
+        # aiomysql / asyncmy
+        size = pool.size
+        idle = pool.freesize
+        min_size = pool.minsize
+        max_size = pool.maxsize
+        condition = getattr(pool, "_cond", None) or getattr(pool, "cond", None)
+        waiters = getattr(condition, "_waiters", None)
+        waiting = len(waiters) if waiters is not None else None
+    else:
+        return None
+
+    in_use = size - idle
+    return {
+        "size": size,
+        "idle": idle,
+        "in_use": in_use,
+        "waiting": waiting,
+        "min_size": min_size,
+        "max_size": max_size,
+        "utilization": round(in_use / max_size, 3) if max_size else None,
+    }
+
+
+# Routes read queries of the person endpoints to read replicas.
+# Provides the read methods of databases.Database (fetch_all, fetch_one) and picks
+# a healthy replica round-robin for every query. Reads go to the primary when no replica is
+# configured or healthy, and for sticky_seconds after a write by the same X-Road client
+# (read-your-writes within this worker only: other workers do not know about the write).
+# A replica that fails is skipped for retry_interval seconds and the query is repeated on the primary.
+class ReadReplicaRouter:
+    def __init__(self, primary: databases.Database, replicas: list,
+                 sticky_seconds: float = 5.0, retry_interval: float = 30.0):
+        self.primary = primary
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self.retry_interval = retry_interval
+        self._next = 0
+        self._down_until = [0.0] * len(replicas)
+        self._last_write = {}  # X-Road client -> monotonic time of its last write
+
+    @property
+    def url(self):
+        return self.primary.url
+
+    async def connect(self) -> None:
+        for index, replica in enumerate(self.replicas):
+            await self._connect_replica(index)
+
+    async def disconnect(self) -> None:
+        for replica in self.replicas:
+            if replica.is_connected:
+                await replica.disconnect()
+
+    def record_write(self) -> None:
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        self._last_write[self._client_key()] = now
+        # Forget clients whose window is over
+        if len(self._last_write) > 1000:
+            self._last_write = {key: at for key, at in self._last_write.items() if now - at < self.sticky_seconds}
+
+    # True while the client of the current request is in its read-your-writes window
+    def is_sticky(self) -> bool:
+        if not self.replicas:
+            return False
+        last_write = self._last_write.get(self._client_key())
+        return last_write is not None and time.monotonic() - last_write < self.sticky_seconds
+
+    def replica_status(self) -> list:
+        now = time.monotonic()
+        return [
+            {
+                "host": replica.url.hostname,
+                "healthy": replica.is_connected and self._down_until[index] <= now,
+                "pool": get_pool_stats(replica),
+            }
+            for index, replica in enumerate(self.replicas)
+        ]
+
+    async def fetch_all(self, query, values: dict = None):
+        return await self._read(lambda db: db.fetch_all(query, values))
+
+    async def fetch_one(self, query, values: dict = None):
+        return await self._read(lambda db: db.fetch_one(query, values))
+
+    async def _read(self, operation):
+        index = await self._pick()
+        if index is None:
+            return await operation(self.primary)
+        try:
+            return await operation(self.replicas[index])
+        except Exception as e:
+            self._mark_down(index, e)
+            return await operation(self.primary)
+
+    async def _pick(self) -> Optional[int]:
+        # Index of the replica for the next read, or None to read from the primary
+        if not self.replicas or self.is_sticky():
+            return None
+
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+            if self._down_until[index] > now:
+                continue
+            if not self.replicas[index].is_connected and not await self._connect_replica(index):
+                continue
+            return index
+        return None
+
+    async def _connect_replica(self, index: int) -> bool:
+        replica = self.replicas[index]
+        try:
+            await replica.connect()
+            logger.info("Connected to read replica %s", replica.url.hostname)
+            return True
+        except Exception as e:
+            self._mark_down(index, e)
+            return False
+
+    def _mark_down(self, index: int, error: Exception) -> None:
+        self._down_until[index] = time.monotonic() + self.retry_interval
+        logger.error("Read replica %s failed, using the primary for %ss: %s",
+                     self.replicas[index].url.hostname, self.retry_interval, error)
+
+    @staticmethod
+    def _client_key() -> str:
+        context = current_xroad_context()
+        return context.client if context is not None and context.client else ""
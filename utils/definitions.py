@@ -5,4 +5,18 @@ surname_len = 128
 patronym_len = 128
 rnokpp_len = 10
 passport_number_len = 9
-unzr_len = 14
\ No newline at end of file
+unzr_len = 14
+
+# Keyset pagination of GET /person
+default_page_limit = 100
+max_page_limit = 1000
+
+# Number of rows read and sent as one page of the streaming export
+export_chunk_rows = 500
+
+# Batch creation of persons (POST /person/batch)
+max_batch_items = 10000
+batch_chunk_rows = 500
+
+# Multi-field search (POST /person/search): most values in one IN list of a unique key
+max_search_keys = 1000
@@ -1,10 +1,13 @@
-from models.person import person_table as Person
 from fastapi import HTTPException
 import databases
-from sqlalchemy import delete
 import logging
 from opentelemetry import trace
 
+from utils.person_cache import person_cache
+from utils.statements import person_statements, execute_rowcount
+from utils.metrics import track_db_operation
+from utils.tracing import db_span
+
 # Create a logger instance
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
@@ -15,17 +18,15 @@ tracer = trace.get_tracer(__name__)
 async def delete_person_in_db(person_data: dict, db: databases.Database):
     logger.info("Received data for deletion: %s", person_data)
 
-    query = delete(Person).where(Person.c.unzr == str(person_data.get("unzr")))
+    statement = person_statements(db).delete_by_unzr()
 
     try:
-        with tracer.start_as_current_span("DB: delete person by UNZR") as span:
-            span.set_attribute("db.system", "mysql")
-            span.set_attribute("db.operation", "DELETE")
-            span.set_attribute("db.statement", str(query))
-            span.set_attribute("db.table", Person.name)
-            span.set_attribute("app.layer", "database")
-
-            status = await db.execute(query)
+        with db_span(tracer, "DB: delete person by UNZR", "DELETE", statement.sql):
+
+            with track_db_operation("DELETE", "delete_person"):
+                status = await execute_rowcount(db, statement, unzr=str(person_data.get("unzr")))
+
+        await person_cache.invalidate(person_data)
 
         logger.info("Number of records deleted: %d", status)
 
@@ -0,0 +1,84 @@
+import databases
+import csv
+import io
+import json
+import logging
+from opentelemetry import trace
+
+from utils import definitions
+from utils.statements import person_statements, PERSON_COLUMNS
+from utils.metrics import track_db_operation
+from utils.tracing import start_db_span
+from utils.serialization import plain_value
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _ndjson_line(row) -> str:
+    return json.dumps({key: plain_value(row[key]) for key in row.keys()}, ensure_ascii=False) + "\n"
+
+
+def _csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+# Async generator that streams all records from the database in the requested format.
+# Rows are read in keyset pages of definitions.export_chunk_rows rows (the GET /person query)
+# and every page is yielded before the next one is read, so memory use does not depend on
+# the table size. Database.iterate() is not used: the aiomysql and asyncmy backends of
+# "databases" read the whole result into memory before returning the first row.
+# Each page is a query of its own, so rows written during the export may or may not appear.
+async def export_persons_from_db(db: databases.Database, export_format: str):
+    logger.info("Request to export all records from the database in %s format", export_format)
+
+    statements = person_statements(db)
+    first_page = statements.select_page(False)
+    next_page = statements.select_page(True)
+    limit = definitions.export_chunk_rows
+
+    # The span lives as long as the stream, so it is not attached to the current context
+    span = start_db_span(tracer, "DB: export all persons", "SELECT", next_page.sql)
+
+    exported = 0
+    try:
+        header = _csv_line([column.name for column in PERSON_COLUMNS]) if export_format == "csv" else ""
+
+        query = first_page.bind(limit=limit)
+        while True:
+            with track_db_operation("SELECT", "export_persons"):
+                rows = await db.fetch_all(query)
+
+            if export_format == "csv":
+                chunk = [_csv_line([plain_value(row[column.name]) for column in PERSON_COLUMNS]) for row in rows]
+            else:
+                chunk = [_ndjson_line(row) for row in rows]
+            exported += len(rows)
+
+            if header or chunk:
+                yield header + "".join(chunk)
+                header = ""
+
+            if len(rows) < limit:
+                break
+            query = next_page.bind(after=rows[-1]["id"], limit=limit)
+
+        logger.info("Exported %d records from the database", exported)
+
+    except Exception as e:
+        # Headers are already sent at this point, so the stream can only be cut short
+        logger.error("Error while exporting records after %d rows: %s", exported, e)
+        span.set_status(trace.status.Status(trace.status.StatusCode.ERROR, description=str(e)))
+        raise
+
+    finally:
+        span.set_attribute("db.rows", exported)
+        span.end()
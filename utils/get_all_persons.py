@@ -1,48 +1,75 @@
-from models.person import person_table as Person
 from fastapi import HTTPException
 import databases
-from sqlalchemy import select
+import base64
+import binascii
 import logging
+from typing import Optional
 from opentelemetry import trace
 
+from utils.statements import person_statements
+from utils.metrics import track_db_operation
+from utils.tracing import db_span
+from utils.single_flight import read_flights
+
 # Create a logger instance
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
 
-# Function to retrieve all records from the database
-async def get_all_persons_from_db(db: databases.Database):
-    logger.info("Request to retrieve all records from the database")
-
-    # Prepare the query to fetch data
-    query = select(
-        Person.c.id,
-        Person.c.name,
-        Person.c.surname,
-        Person.c.patronym,
-        Person.c.dateOfBirth,
-        Person.c.gender,
-        Person.c.rnokpp,
-        Person.c.passportNumber,
-        Person.c.unzr,
-    ).select_from(Person)
 
+# Functions to build and parse the opaque pagination cursor.
+# The cursor wraps the last returned "id" so clients do not depend on its format.
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
     try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        logger.warning("Invalid pagination cursor: %s", cursor)
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    if last_id < 0:
+        logger.warning("Invalid pagination cursor: %s", cursor)
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return last_id
+
+
+# Function to retrieve one page of records from the database.
+# Pages are ordered by "id" and continue after the id wrapped in the "after" cursor,
+# so every call reads at most "limit" + 1 rows through the primary key index.
+async def get_all_persons_from_db(db: databases.Database, limit: int, after: Optional[str] = None):
+    logger.info("Request to retrieve records from the database: limit=%s, after=%s", limit, after)
+
+    # Bind the page bounds to the precompiled query; one extra row tells whether another page exists
+    statement = person_statements(db).select_page(after is not None)
+    if after is not None:
+        query = statement.bind(after=decode_cursor(after), limit=limit + 1)
+    else:
+        query = statement.bind(limit=limit + 1)
+
+    # Run by one of the identical concurrent page requests, the others share its result
+    async def select():
         # Create telemetry span for the SELECT query
-        with tracer.start_as_current_span("DB: select all persons") as span:
-            span.set_attribute("db.system", "mysql")
-            span.set_attribute("db.operation", "SELECT")
-            span.set_attribute("db.statement", str(query))
-            span.set_attribute("db.table", Person.name)
-            span.set_attribute("app.layer", "database")
+        with db_span(tracer, "DB: select all persons", "SELECT", statement.sql):
 
-            persons = await db.fetch_all(query)
+            with track_db_operation("SELECT", "get_all_persons"):
+                return await db.fetch_all(query)
+
+    try:
+        persons = await read_flights.do("get_all_persons", db, (limit, after), select)
 
         if not persons:
             logger.warning("No records found")
             raise HTTPException(status_code=404, detail="Person not found")
 
-        logger.info("Successfully retrieved all records from the database")
-        return persons
+        next_cursor = None
+        if len(persons) > limit:
+            persons = persons[:limit]
+            next_cursor = encode_cursor(persons[-1]["id"])
+
+        logger.info("Successfully retrieved %d records from the database", len(persons))
+        return persons, next_cursor
 
     except HTTPException as http_error:
         logger.warning("HTTP error occurred: %s", http_error)
@@ -54,4 +81,4 @@ async def get_all_persons_from_db(db: databases.Database):
 
     except Exception as e:
         logger.error("Unexpected error occurred while retrieving data: %s", e)
-        raise HTTPException(status_code=500, detail="Failed to retrieve person")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to retrieve person")
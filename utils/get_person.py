@@ -1,10 +1,17 @@
 from models.person import person_table as Person
+from datetime import date
+from sqlalchemy import Date
 from fastapi import HTTPException
 import databases
-from sqlalchemy import select, and_
 import logging
 from opentelemetry import trace
 
+from utils.person_cache import person_cache
+from utils.statements import person_statements
+from utils.metrics import track_db_operation
+from utils.tracing import db_span
+from utils.single_flight import read_flights
+
 # Create a logger instance
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
@@ -13,43 +20,54 @@ tracer = trace.get_tracer(__name__)
 async def get_person_by_params_from_db(params: dict, db: databases.Database):
     logger.info("Request to retrieve data with parameters: %s", params)
 
-    # Create a list of conditions for the search
-    conditions = []
-    for key, value in params.items():
-        if hasattr(Person.c, key):
-            conditions.append(getattr(Person.c, key) == value)
+    # Keep only the parameters that are columns of the table
+    conditions = {key: value for key, value in params.items() if key in Person.c}
 
     if not conditions:
         logger.warning("No search parameters provided")
         raise HTTPException(status_code=400, detail="No search parameters provided")
 
-    # Create a database query to fetch data
-    query = (
-        select(
-            Person.c.id,
-            Person.c.name,
-            Person.c.surname,
-            Person.c.patronym,
-            Person.c.dateOfBirth,
-            Person.c.gender,
-            Person.c.rnokpp,
-            Person.c.passportNumber,
-            Person.c.unzr,
-        )
-        .select_from(Person)
-        .where(and_(*conditions))
-    )
+    # Path values are strings; Date columns need a date, SQLite and asyncpg do not convert strings
+    for key, value in conditions.items():
+        if isinstance(value, str) and isinstance(Person.c[key].type, Date):
+            try:
+                conditions[key] = date.fromisoformat(value)
+            except ValueError:
+                logger.warning("Invalid date in parameter %s: %s", key, value)
+                raise HTTPException(status_code=400, detail=f"Invalid date in {key}, use YYYY-MM-DD")
 
-    try:
+    # Lookups by a unique column are served from the cache when it is enabled
+    cache_key = person_cache.key_for(params) if person_cache.enabled else None
+    if cache_key is not None:
+        cached = await person_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Retrieved record data from cache: %s", cached)
+            return cached
+        snapshot = await person_cache.snapshot()
+        # Cache misses are read from the primary: rows of a lagging replica would pass the snapshot
+        # check and be served to every worker for the whole ttl
+        db = getattr(db, "primary", db)
+
+    # Bind the search values to the precompiled query for this set of columns
+    statement = person_statements(db).select_by(tuple(conditions))
+    query = statement.bind(**conditions)
+
+    # Run by one of the identical concurrent lookups, the others share its result
+    async def select():
         # Create telemetry span for the SELECT query
-        with tracer.start_as_current_span("DB: select persons by parameter") as span:
-            span.set_attribute("db.system", "mysql")
-            span.set_attribute("db.operation", "SELECT")
-            span.set_attribute("db.statement", str(query))
-            span.set_attribute("db.table", Person.name)
-            span.set_attribute("app.layer", "database")
-
-            person = await db.fetch_all(query)
+        with db_span(tracer, "DB: select persons by parameter", "SELECT", statement.sql):
+
+            with track_db_operation("SELECT", "get_person"):
+                rows = await db.fetch_all(query)
+
+        if rows and cache_key is not None:
+            await person_cache.put(cache_key, rows, snapshot)
+        return rows
+
+    try:
+        # Lookups are the same whatever the order and the type of the parameter values
+        flight_key = tuple((key, str(conditions[key])) for key in sorted(conditions))
+        person = await read_flights.do("get_person", db, flight_key, select)
 
         if not person:
             logger.warning("No record found with parameters %s", params)
@@ -0,0 +1,119 @@
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+LOG_OVERFLOW_POLICIES = ("drop", "block")
+
+_STOP = object()
+
+
+# QueueHandler for a bounded queue.
+# Records are put on the queue as they are: formatting is left to the listener thread.
+# When the queue is full the record is dropped and counted ("drop") or the caller waits ("block").
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue: queue.Queue, overflow: str = "drop"):
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Tracebacks must be rendered now, while the exception is still current
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Background thread that takes records from the queue, formats them with the target
+# handler's formatter and writes up to batch_size records with a single write + flush.
+class BatchingQueueListener:
+    def __init__(self, log_queue: queue.Queue, handler: logging.StreamHandler,
+                 queue_handler: BoundedQueueHandler, batch_size: int = 256):
+        self.queue = log_queue
+        self.handler = handler
+        self.queue_handler = queue_handler
+        self.batch_size = max(1, batch_size)
+        self._reported_drops = 0
+        self._thread = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self.queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        self.handler.close()
+
+    # A forked worker (server.py) inherits the queue but not the writer thread, and the queue's
+    # lock may have been held by that thread: give the child its own queue and thread.
+    def _after_fork(self) -> None:
+        running = self._thread is not None
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.queue_handler.queue = self.queue
+        self.queue_handler.dropped = 0
+        self._reported_drops = 0
+        self._thread = None
+        if running:
+            self.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = []
+            last_record = None
+            for record in batch:
+                if record is _STOP:
+                    stopping = True
+                    continue
+                last_record = record
+                if record.levelno < self.handler.level:
+                    continue
+                try:
+                    lines.append(self.handler.format(record) + self.handler.terminator)
+                except Exception:
+                    self.handler.handleError(record)
+
+            dropped = self.queue_handler.dropped
+            if dropped != self._reported_drops:
+                lines.append(f"logging queue full, {dropped - self._reported_drops} log records dropped"
+                             + self.handler.terminator)
+                self._reported_drops = dropped
+
+            if lines:
+                self._write("".join(lines), last_record)
+
+    def _write(self, text: str, record) -> None:
+        self.handler.acquire()
+        try:
+            if self.handler.stream is None and isinstance(self.handler, logging.FileHandler):
+                self.handler.stream = self.handler._open()
+            self.handler.stream.write(text)
+            self.handler.flush()
+        except Exception:
+            if record is not None:
+                self.handler.handleError(record)
+        finally:
+            self.handler.release()
@@ -0,0 +1,144 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from starlette.responses import Response
+from starlette.routing import Match
+
+
+# Buckets of the latency histograms, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metrics are written to PROMETHEUS_MULTIPROC_DIR when it is set, so /metrics of any worker
+# can report the sum of all workers (see metrics_response). Gauges of live values only count
+# workers that are still running ("livesum").
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being handled",
+    ["method", "route"], multiprocess_mode="livesum",
+)
+DB_OPERATION_DURATION = Histogram(
+    "db_operation_duration_seconds", "Time of a database operation of a person endpoint",
+    ["operation", "query"], buckets=LATENCY_BUCKETS,
+)
+DB_OPERATION_ERRORS = Counter(
+    "db_operation_errors", "Database operations that raised an error",
+    ["operation", "query"],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Connections of the database connection pools by state",
+    ["database", "state"], multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Requests waiting for a slot of an admission control limiter",
+    ["limiter"], multiprocess_mode="livesum",
+)
+ADMISSION_SHED = Counter(
+    "admission_shed", "Requests rejected with 503 by admission control",
+    ["limiter", "reason"],
+)
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests", "Reads that shared the query of an identical concurrent read instead of running their own",
+    ["query"],
+)
+
+# Route label of requests that matched no route, so unknown paths do not create new series
+UNMATCHED_ROUTE = "unmatched"
+
+
+# Context manager that times one database operation (SQL verb and name of the query)
+@contextmanager
+def track_db_operation(operation: str, query: str):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_OPERATION_ERRORS.labels(operation, query).inc()
+        raise
+    finally:
+        DB_OPERATION_DURATION.labels(operation, query).observe(time.perf_counter() - started)
+
+
+# ASGI middleware that records the duration and number of in-flight requests per route.
+# The route label is the path template (/person/{param}/{value}), never the raw path;
+# it is found by matching the request against "routes" (the application's route list).
+# pool_stats, if given, returns {database name: get_pool_stats() result}; the pool gauges
+# are refreshed from it after every request.
+class MetricsMiddleware:
+    def __init__(self, app, routes: list, metrics_path: str = "/metrics",
+                 pool_stats: Optional[Callable[[], dict]] = None):
+        self.app = app
+        self.routes = routes
+        self.metrics_path = metrics_path
+        self.pool_stats = pool_stats
+
+    def _route_label(self, scope) -> str:
+        partial = None
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                # Path matches but the method does not (405)
+                partial = route.path
+        return partial or UNMATCHED_ROUTE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == self.metrics_path:
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        method = scope["method"]
+        route = self._route_label(scope)
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, status_send)
+        finally:
+            in_flight.dec()
+            HTTP_REQUEST_DURATION.labels(method, route, status).observe(time.perf_counter() - started)
+            if self.pool_stats is not None:
+                update_pool_metrics(self.pool_stats())
+
+
+def update_pool_metrics(pools: dict) -> None:
+    for database, stats in pools.items():
+        if stats is None:
+            continue
+        for state in ("size", "idle", "in_use", "waiting", "max_size"):
+            if stats.get(state) is not None:
+                DB_POOL_CONNECTIONS.labels(database, state).set(stats[state])
+
+
+# Response of the /metrics endpoint: the metrics of all workers when they share
+# PROMETHEUS_MULTIPROC_DIR, otherwise those of this process
+def metrics_response() -> Response:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
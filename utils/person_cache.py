@@ -0,0 +1,329 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from models.person import person_table as Person
+from utils.serialization import plain_value
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# Only lookups by a unique column return at most one row and can be invalidated precisely
+CACHEABLE_COLUMNS = frozenset(column.name for column in Person.columns if column.unique)
+
+CACHE_BACKENDS = ("local", "redis")
+
+# Redis key layout of the shared backend
+REDIS_PREFIX = "person-cache:"
+REDIS_GENERATION_KEY = REDIS_PREFIX + "generation"
+REDIS_CHANNEL = REDIS_PREFIX + "invalidate"
+
+# Store rows only if no invalidation happened since the reader took its snapshot.
+# KEYS[1] generation key, KEYS[2] entry key, KEYS[3..] per-UNZR index keys
+# ARGV[1] snapshot generation, ARGV[2] serialized rows, ARGV[3] ttl in ms, ARGV[4] entry name
+_REDIS_PUT_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'PX', ARGV[3])
+for i = 3, #KEYS do
+    redis.call('SADD', KEYS[i], ARGV[4])
+    redis.call('PEXPIRE', KEYS[i], ARGV[3])
+end
+return 1
+"""
+
+# Bump the generation, drop the entries of one person and tell every worker about it.
+# KEYS[1] generation key, KEYS[2] per-UNZR index key, KEYS[3..] entry keys built from the written values
+# ARGV[1] channel, ARGV[2] message, ARGV[3] entry key prefix
+_REDIS_INVALIDATE_SCRIPT = """
+redis.call('INCR', KEYS[1])
+for _, name in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+    redis.call('DEL', ARGV[3] .. name)
+end
+redis.call('DEL', KEYS[2])
+for i = 3, #KEYS do
+    redis.call('DEL', KEYS[i])
+end
+redis.call('PUBLISH', ARGV[1], ARGV[2])
+return 1
+"""
+
+
+def _entry_name(key: tuple) -> str:
+    return json.dumps(key, ensure_ascii=False)
+
+
+# In-process LRU store with a TTL.
+# Keys are (column, value); entries are also indexed by the UNZR of the cached row,
+# so a write to a person drops every key that points to that person.
+class LocalCacheBackend:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (column, value) -> (expires_at, rows)
+        self._keys_by_unzr = {}        # unzr -> set of (column, value)
+        self._generation = 0           # bumped on every invalidation
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: tuple) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            return entry[1]
+        if entry is not None:
+            self._drop(key)
+        return None
+
+    def put(self, key: tuple, rows: list, generation: int) -> None:
+        # A write that happened while the rows were being read makes them unsafe to cache
+        if generation != self._generation:
+            return
+
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, rows)
+        for row in rows:
+            self._keys_by_unzr.setdefault(row["unzr"], set()).add(key)
+
+        while len(self._entries) > self.max_size:
+            oldest_key = next(iter(self._entries))
+            self._drop(oldest_key)
+
+    def invalidate(self, person_data: dict) -> None:
+        # Drop every entry of the person with this UNZR and every key built from the given values
+        self._generation += 1
+        keys = set(self._keys_by_unzr.pop(str(person_data.get("unzr")), ()))
+        for column in CACHEABLE_COLUMNS:
+            if person_data.get(column) is not None:
+                keys.add((column, str(person_data[column])))
+        for key in keys:
+            self._drop(key)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._keys_by_unzr.clear()
+
+    def _drop(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for row in entry[1]:
+            keys = self._keys_by_unzr.get(row["unzr"])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_unzr[row["unzr"]]
+
+
+# Node-wide store shared by all workers, kept in Redis (TCP or unix socket).
+# Every invalidation is published on a channel; each worker listens to it and drops
+# the same entries from its own small LocalCacheBackend that sits in front of Redis.
+class RedisCacheBackend:
+    def __init__(self, url: str, ttl: float, local: LocalCacheBackend):
+        # Imported here so the redis package is only needed when this backend is selected
+        import redis.asyncio
+
+        self.url = url
+        self.ttl_ms = max(1, int(ttl * 1000))
+        self.local = local
+        self._client = redis.asyncio.Redis.from_url(url, decode_responses=True)
+        self._put_script = self._client.register_script(_REDIS_PUT_SCRIPT)
+        self._invalidate_script = self._client.register_script(_REDIS_INVALIDATE_SCRIPT)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self._client.ping()
+        self._listener = asyncio.create_task(self._listen())
+        logger.info("Shared person cache connected to %s", self.url)
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._client.aclose()
+
+    async def snapshot(self) -> tuple:
+        return (await self._client.get(REDIS_GENERATION_KEY) or "0"), self.local.generation
+
+    async def get(self, key: tuple) -> Optional[Any]:
+        rows = self.local.get(key)
+        if rows is not None:
+            return rows
+
+        local_generation = self.local.generation
+        data = await self._client.get(REDIS_PREFIX + _entry_name(key))
+        if data is None:
+            return None
+        rows = json.loads(data)
+        self.local.put(key, rows, local_generation)
+        return rows
+
+    async def put(self, key: tuple, rows: list, snapshot: tuple) -> None:
+        shared_generation, local_generation = snapshot
+        plain_rows = [{name: plain_value(value) for name, value in dict(row).items()} for row in rows]
+        name = _entry_name(key)
+        index_keys = [REDIS_PREFIX + "unzr:" + row["unzr"] for row in plain_rows]
+        await self._put_script(
+            keys=[REDIS_GENERATION_KEY, REDIS_PREFIX + name, *index_keys],
+            args=[shared_generation, json.dumps(plain_rows, ensure_ascii=False), self.ttl_ms, name],
+        )
+        self.local.put(key, plain_rows, local_generation)
+
+    async def invalidate(self, person_data: dict) -> None:
+        self.local.invalidate(person_data)
+        plain_data = {column: str(person_data[column]) for column in CACHEABLE_COLUMNS
+                      if person_data.get(column) is not None}
+        entry_keys = [REDIS_PREFIX + _entry_name((column, value)) for column, value in plain_data.items()]
+        await self._invalidate_script(
+            keys=[REDIS_GENERATION_KEY, REDIS_PREFIX + "unzr:" + str(person_data.get("unzr")), *entry_keys],
+            args=[REDIS_CHANNEL, json.dumps(plain_data, ensure_ascii=False), REDIS_PREFIX],
+        )
+
+    async def _listen(self) -> None:
+        # Apply invalidations published by any worker; reconnect and start clean after errors
+        while True:
+            try:
+                async with self._client.pubsub() as pubsub:
+                    await pubsub.subscribe(REDIS_CHANNEL)
+                    # Messages may have been missed while not subscribed
+                    self.local.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.local.invalidate(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Person cache invalidation listener failed, reconnecting: %s", e)
+                self.local.clear()
+                await asyncio.sleep(1)
+
+
+# Person lookup cache used by the data-access functions.
+# Delegates storage to the configured backend and keeps hit/miss statistics of this worker.
+class PersonCache:
+    def __init__(self):
+        self.enabled = False
+        self.stats_log_interval = 0
+        self.hits = 0
+        self.misses = 0
+        self._backend = None
+
+    def configure(self, settings) -> None:
+        self.enabled = settings.enabled and settings.max_size > 0 and settings.ttl > 0
+        self.stats_log_interval = settings.stats_log_interval
+        self.hits = 0
+        self.misses = 0
+        self._backend = None
+        if not self.enabled:
+            logger.info("Person lookup cache disabled")
+            return
+
+        if settings.backend == "redis":
+            local = LocalCacheBackend(settings.max_size, min(settings.ttl, settings.local_ttl))
+            self._backend = RedisCacheBackend(settings.redis_url, settings.ttl, local)
+        else:
+            if settings.backend != "local":
+                logger.warning("Unknown cache backend '%s', using 'local'", settings.backend)
+            self._backend = LocalCacheBackend(settings.max_size, settings.ttl)
+        logger.info("Person lookup cache enabled: backend=%s max_size=%s ttl=%ss",
+                    settings.backend, settings.max_size, settings.ttl)
+
+    async def start(self) -> None:
+        if isinstance(self._backend, RedisCacheBackend):
+            try:
+                await self._backend.start()
+            except Exception as e:
+                # Without the shared store and its invalidation events the cache could serve stale rows
+                logger.error("Shared person cache unavailable, cache disabled: %s", e)
+                self.enabled = False
+
+    async def stop(self) -> None:
+        if isinstance(self._backend, RedisCacheBackend):
+            await self._backend.stop()
+
+    @staticmethod
+    def key_for(params: dict) -> Optional[tuple]:
+        # Returns the cache key for a lookup, or None if the lookup is not cacheable
+        if len(params) != 1:
+            return None
+        (column, value), = params.items()
+        if column not in CACHEABLE_COLUMNS:
+            return None
+        return column, str(value)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    async def snapshot(self) -> Any:
+        # Token taken before reading the DB; put() ignores rows read across an invalidation
+        if isinstance(self._backend, RedisCacheBackend):
+            return await self._backend.snapshot()
+        return self._backend.generation
+
+    async def get(self, key: tuple) -> Optional[Any]:
+        try:
+            if isinstance(self._backend, RedisCacheBackend):
+                rows = await self._backend.get(key)
+            else:
+                rows = self._backend.get(key)
+        except Exception as e:
+            logger.warning("Person cache lookup failed: %s", e)
+            rows = None
+
+        if rows is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._log_stats()
+        return rows
+
+    async def put(self, key: tuple, rows: list, snapshot: Any) -> None:
+        try:
+            if isinstance(self._backend, RedisCacheBackend):
+                await self._backend.put(key, rows, snapshot)
+            else:
+                self._backend.put(key, rows, snapshot)
+        except Exception as e:
+            logger.warning("Person cache store failed: %s", e)
+
+    async def invalidate(self, person_data: dict) -> None:
+        if not self.enabled:
+            return
+        if isinstance(self._backend, RedisCacheBackend):
+            try:
+                await self._backend.invalidate(person_data)
+            except Exception as e:
+                logger.error("Person cache invalidation failed, other workers may serve stale rows: %s", e)
+        else:
+            self._backend.invalidate(person_data)
+
+    def _log_stats(self) -> None:
+        lookups = self.hits + self.misses
+        if self.stats_log_interval and lookups % self.stats_log_interval == 0:
+            logger.info("Person lookup cache: hits=%d misses=%d hit_ratio=%.3f local_size=%d",
+                        self.hits, self.misses, self.hit_ratio, self._local_size())
+
+    def _local_size(self) -> int:
+        if isinstance(self._backend, RedisCacheBackend):
+            return len(self._backend.local)
+        return len(self._backend)
+
+
+# Cache shared by all requests of this worker process
+person_cache = PersonCache()
@@ -0,0 +1,116 @@
+from datetime import date
+import enum
+from typing import Optional
+
+from fastapi.responses import Response
+import msgpack
+import orjson
+
+from utils.statements import PERSON_COLUMNS
+
+# Response keys of a person row, in the order of PERSON_COLUMNS.
+# Plain str: orjson does not accept the str subclass SQLAlchemy uses for column names.
+PERSON_KEYS = tuple(str(column.name) for column in PERSON_COLUMNS)
+
+# Media type of the columnar JSON layout
+COLUMNAR_JSON = "application/vnd.person.columnar+json"
+
+
+def _row_values(row) -> list:
+    # Values of a database row (or of a cached dict) in PERSON_KEYS order
+    if isinstance(row, dict):
+        return [row[key] for key in PERSON_KEYS]
+    return list(row.values())
+
+
+def _encode_row(value):
+    # Called by orjson for values it cannot write itself: the database rows.
+    # Every person SELECT returns PERSON_COLUMNS, so values are matched to keys by position.
+    if hasattr(value, "values"):
+        return dict(zip(PERSON_KEYS, value.values()))
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _encode_msgpack(value):
+    # MessagePack has no date type; dates are written as ISO strings like in JSON
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return _encode_row(value)
+
+
+# JSON response for person rows, rendered straight to bytes with orjson.
+# Handlers return it instead of a dict, which skips FastAPI's jsonable_encoder pass over
+# every row and field. Dates, enums and UTF-8 text are written natively by orjson, so the
+# body is the same JSON as before.
+class PersonJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_encode_row)
+
+
+# The same structure as PersonJSONResponse, encoded as MessagePack
+class PersonMsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content) -> bytes:
+        return msgpack.packb(content, default=_encode_msgpack)
+
+
+# Columnar JSON: field names are sent once instead of in every row.
+#   {"message": {"columns": ["id", "name", ...], "rows": [[1, "Марина", ...], ...]}, "next": ...}
+class PersonColumnarJSONResponse(Response):
+    media_type = COLUMNAR_JSON
+
+    def render(self, content) -> bytes:
+        columnar = dict(content)
+        columnar["message"] = {"columns": PERSON_KEYS, "rows": [_row_values(row) for row in content["message"]]}
+        return orjson.dumps(columnar)
+
+
+# Response classes of the person read endpoints by media type
+PERSON_RESPONSE_TYPES = {
+    "application/json": PersonJSONResponse,
+    "application/msgpack": PersonMsgPackResponse,
+    "application/x-msgpack": PersonMsgPackResponse,
+    COLUMNAR_JSON: PersonColumnarJSONResponse,
+}
+
+
+# Picks the response class for the Accept header of a request.
+# Media ranges are tried by falling quality; wildcards, a missing header and
+# types the service does not produce all give the default JSON.
+def negotiate_person_response(accept: Optional[str]) -> type:
+    if not accept:
+        return PersonJSONResponse
+
+    ranges = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((-quality, position, media_type.strip().lower()))
+
+    for negative_quality, _, media_type in sorted(ranges):
+        if negative_quality == 0:
+            break
+        response_class = PERSON_RESPONSE_TYPES.get(media_type)
+        if response_class is not None:
+            return response_class
+        if media_type in ("*/*", "application/*"):
+            return PersonJSONResponse
+    return PersonJSONResponse
+
+
+# Builds the response of a person read endpoint in the format the client asked for
+def person_response(content: dict, accept: Optional[str]) -> Response:
+    response_class = negotiate_person_response(accept)
+    return response_class(content, headers={"Vary": "Accept"})
@@ -0,0 +1,88 @@
+from models.person import person_table as Person
+from fastapi import HTTPException
+import databases
+import logging
+from typing import Optional
+from opentelemetry import trace
+
+from utils.get_all_persons import encode_cursor, decode_cursor
+from utils.statements import person_statements, in_list_size
+from utils.metrics import track_db_operation
+from utils.tracing import db_span
+from utils.single_flight import read_flights
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+# Search fields that hold a list of values and the column they are matched against
+IN_LIST_FIELDS = {
+    "rnokpp_in": "rnokpp",
+    "passportNumber_in": "passportNumber",
+    "unzr_in": "unzr",
+}
+
+
+# Function to search for records by several fields in one query.
+# "params" holds the fields of a PersonSearch: single values are matched with "=",
+# lists of unique keys with IN. Results are paged by "id" like GET /person.
+async def search_persons_in_db(params: dict, db: databases.Database, limit: int, after: Optional[str] = None):
+    logger.info("Request to search records: %s, limit=%s, after=%s", params, limit, after)
+
+    conditions = {key: value for key, value in params.items() if key in Person.c and value is not None}
+    key_lists = {IN_LIST_FIELDS[key]: value for key, value in params.items() if key in IN_LIST_FIELDS and value}
+
+    if not conditions and not key_lists:
+        logger.warning("No search parameters provided")
+        raise HTTPException(status_code=400, detail="No search parameters provided")
+
+    # Lists are padded with their last value to a power-of-two size, so the number of
+    # precompiled statements stays small whatever the list lengths are
+    values = dict(conditions)
+    in_columns = []
+    for column, keys in key_lists.items():
+        # Sorted, so searches for the same keys in another order share one query (see below)
+        keys = sorted(set(keys))
+        size = in_list_size(len(keys))
+        keys += [keys[-1]] * (size - len(keys))
+        values.update({f"{column}_in_{n}": key for n, key in enumerate(keys)})
+        in_columns.append((column, size))
+
+    statement = person_statements(db).select_search(tuple(conditions), tuple(in_columns), after is not None)
+    if after is not None:
+        values["after"] = decode_cursor(after)
+    # One extra row tells whether another page exists
+    query = statement.bind(limit=limit + 1, **values)
+
+    # Run by one of the identical concurrent searches, the others share its result
+    async def select():
+        # Create telemetry span for the SELECT query
+        with db_span(tracer, "DB: search persons", "SELECT", statement.sql):
+
+            with track_db_operation("SELECT", "search_persons"):
+                return await db.fetch_all(query)
+
+    try:
+        # The bound values name the columns and the page, so they identify the search
+        flight_key = (limit, tuple(sorted(values.items())))
+        persons = await read_flights.do("search_persons", db, flight_key, select)
+
+        if not persons:
+            logger.warning("No record found with parameters %s", params)
+            raise HTTPException(status_code=404, detail="Person not found")
+
+        next_cursor = None
+        if len(persons) > limit:
+            persons = persons[:limit]
+            next_cursor = encode_cursor(persons[-1]["id"])
+
+        logger.info("Found %d records", len(persons))
+        return persons, next_cursor
+
+    except HTTPException as http_error:
+        logger.warning("HTTP error occurred: %s", http_error)
+        raise http_error
+
+    except Exception as e:
+        logger.error("Error while executing search query: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to retrieve person")
@@ -0,0 +1,12 @@
+import enum
+from datetime import date
+
+
+# Convert a DB value to what the json and csv modules can write and handlers can return unchanged:
+# enums (gender) to their value, dates to ISO strings
+def plain_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
@@ -0,0 +1,57 @@
+import asyncio
+import functools
+import logging
+from typing import Any, Awaitable, Callable, Hashable
+
+from utils.metrics import COALESCED_REQUESTS
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+
+# Coalescing of identical concurrent reads ("single flight").
+# The first request for a key runs the query; requests for the same key that arrive while
+# it runs wait for it and get the same result or exception instead of running their own.
+# The query runs as a task of its own, so a leader that is cancelled (client disconnected)
+# does not cancel it for the others. Nothing is kept after the query finishes.
+class SingleFlight:
+    def __init__(self):
+        self.enabled = True
+        self._calls = {}  # (query, source, key) -> task
+
+    async def do(self, query: str, db, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await function()
+
+        full_key = (query, _source(db), key)
+        call = self._calls.get(full_key)
+        if call is None:
+            call = asyncio.ensure_future(function())
+            self._calls[full_key] = call
+            call.add_done_callback(functools.partial(self._done, full_key))
+        else:
+            COALESCED_REQUESTS.labels(query).inc()
+        return await asyncio.shield(call)
+
+    # Called after every write: reads that start later must not share a query that may have
+    # run before the write. Queries in flight still complete for the requests waiting on them.
+    def forget(self) -> None:
+        self._calls.clear()
+
+    def _done(self, full_key: tuple, call: asyncio.Future) -> None:
+        if self._calls.get(full_key) is call:
+            del self._calls[full_key]
+        # Mark the exception as retrieved when every waiting request was cancelled
+        if not call.cancelled():
+            call.exception()
+
+
+# Reads of a client in its read-your-writes window (see ReadReplicaRouter) go to the primary
+# and must not share a query that a replica may answer
+def _source(db) -> str:
+    is_sticky = getattr(db, "is_sticky", None)
+    return "primary" if is_sticky is not None and is_sticky() else "any"
+
+
+# Reads of the person endpoints in this worker process
+read_flights = SingleFlight()
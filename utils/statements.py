@@ -0,0 +1,168 @@
+from models.person import person_table as Person
+import databases
+from sqlalchemy import select, insert, update, delete, bindparam, text, or_
+from sqlalchemy.dialects import registry
+import logging
+from typing import Tuple
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# Columns returned by every SELECT on the person table, in response order
+PERSON_COLUMNS = [
+    Person.c.id,
+    Person.c.name,
+    Person.c.surname,
+    Person.c.patronym,
+    Person.c.dateOfBirth,
+    Person.c.gender,
+    Person.c.rnokpp,
+    Person.c.passportNumber,
+    Person.c.unzr,
+]
+
+
+# A statement compiled to SQL once; each request only binds its values.
+# "sql" is the statement text, also used for the "db.statement" span attribute.
+class PreparedStatement:
+    def __init__(self, construct, dialect, result_columns=None):
+        compiled = construct.compile(dialect=dialect)
+        self.sql = str(compiled)
+        self._binds = [bindparam(name, param.value, type_=param.type) for param, name in compiled.bind_names.items()]
+        clause = text(self.sql).bindparams(*self._binds)
+        self._clause = clause.columns(*result_columns) if result_columns else clause
+        self.returns_rows = bool(result_columns)
+
+    def bind(self, **values):
+        return self._clause.bindparams(**values)
+
+    def explain(self, prefix: str = "EXPLAIN ", **values):
+        # The same statement behind an EXPLAIN prefix, for checking its query plan
+        return text(prefix + self.sql).bindparams(*self._binds).bindparams(**values)
+
+
+# Person statements compiled for one SQL dialect.
+# Every statement shape is built on first use and reused by all later requests.
+class PersonStatements:
+    def __init__(self, dialect_name: str):
+        # "named" placeholders (:name) are what sqlalchemy.text() expects
+        self._dialect = registry.load(dialect_name)(paramstyle="named")
+        self._statements = {}
+
+    def _get(self, key, build):
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = build()
+            self._statements[key] = statement
+            logger.debug("Compiled statement %s: %s", key, statement.sql)
+        return statement
+
+    def select_by(self, columns: Tuple[str, ...]) -> PreparedStatement:
+        # Lookup by equality on the given columns; values are bound by column name
+        def build():
+            conditions = [Person.c[column] == bindparam(column, type_=Person.c[column].type) for column in columns]
+            construct = select(*PERSON_COLUMNS).select_from(Person).where(*conditions)
+            return PreparedStatement(construct, self._dialect, PERSON_COLUMNS)
+        return self._get(("select_by", columns), build)
+
+    def select_page(self, after: bool) -> PreparedStatement:
+        # Keyset page ordered by id; binds "limit" and, if after is set, "after"
+        def build():
+            construct = select(*PERSON_COLUMNS).select_from(Person)
+            if after:
+                construct = construct.where(Person.c.id > bindparam("after", type_=Person.c.id.type))
+            construct = construct.order_by(Person.c.id).limit(bindparam("limit", type_=Person.c.id.type))
+            return PreparedStatement(construct, self._dialect, PERSON_COLUMNS)
+        return self._get(("select_page", after), build)
+
+    def select_search(self, columns: Tuple[str, ...], in_columns: Tuple[Tuple[str, int], ...],
+                      after: bool) -> PreparedStatement:
+        # Page of a multi-field search ordered by id: equality on "columns" (bound by column name)
+        # and IN lists of a fixed size on "in_columns" (bound as "<column>_in_<n>"); binds "limit"
+        # and, if after is set, "after"
+        def build():
+            conditions = [Person.c[column] == bindparam(column, type_=Person.c[column].type) for column in columns]
+            for column, size in in_columns:
+                conditions.append(Person.c[column].in_(
+                    [bindparam(f"{column}_in_{n}", type_=Person.c[column].type) for n in range(size)]))
+            if after:
+                conditions.append(Person.c.id > bindparam("after", type_=Person.c.id.type))
+            construct = select(*PERSON_COLUMNS).select_from(Person).where(*conditions)
+            construct = construct.order_by(Person.c.id).limit(bindparam("limit", type_=Person.c.id.type))
+            return PreparedStatement(construct, self._dialect, PERSON_COLUMNS)
+        return self._get(("select_search", columns, in_columns, after), build)
+
+    def select_id_by_unzr(self) -> PreparedStatement:
+        def build():
+            construct = select(Person.c.id).select_from(Person).where(
+                Person.c.unzr == bindparam("unzr", type_=Person.c.unzr.type))
+            return PreparedStatement(construct, self._dialect, [Person.c.id])
+        return self._get(("select_id_by_unzr",), build)
+
+    def insert(self, columns: Tuple[str, ...]) -> PreparedStatement:
+        # Single-row insert returning the new id; values are bound by column name
+        def build():
+            construct = insert(Person).values(
+                {column: bindparam(column, type_=Person.c[column].type) for column in columns}
+            ).returning(Person.c.id)
+            return PreparedStatement(construct, self._dialect, [Person.c.id])
+        return self._get(("insert", columns), build)
+
+    def update_by_unzr(self, columns: Tuple[str, ...]) -> PreparedStatement:
+        # Sets the given columns on the row found by "unzr"; new values are bound as "new_<column>".
+        # The statement counts changed rows only, on every database: MySQL reports changed rows
+        # itself; with RETURNING, rows whose values are already up to date are excluded by
+        # IS DISTINCT FROM. (Not added for MySQL, where <=> follows the case-insensitive collation
+        # and would skip a change of letter case.)
+        def build():
+            values = {column: bindparam("new_" + column, type_=Person.c[column].type) for column in columns}
+            construct = update(Person).where(
+                Person.c.unzr == bindparam("unzr", type_=Person.c.unzr.type)
+            ).values(values)
+            if self._dialect.update_returning:
+                # See execute_rowcount()
+                construct = construct.where(
+                    or_(*[Person.c[column].is_distinct_from(value) for column, value in values.items()])
+                ).returning(Person.c.id)
+                return PreparedStatement(construct, self._dialect, [Person.c.id])
+            return PreparedStatement(construct, self._dialect)
+        return self._get(("update_by_unzr", columns), build)
+
+    def delete_by_unzr(self) -> PreparedStatement:
+        def build():
+            construct = delete(Person).where(Person.c.unzr == bindparam("unzr", type_=Person.c.unzr.type))
+            if self._dialect.delete_returning:
+                # See execute_rowcount()
+                return PreparedStatement(construct.returning(Person.c.id), self._dialect, [Person.c.id])
+            return PreparedStatement(construct, self._dialect)
+        return self._get(("delete_by_unzr",), build)
+
+
+# Function to run an UPDATE or DELETE built by PersonStatements and return the number of rows it changed.
+# Database.execute() only returns that for aiomysql/asyncmy (the cursor's rowcount); asyncpg returns
+# None and aiosqlite may return the connection's last inserted id. On dialects with RETURNING the
+# statement returns the ids of its rows, and they are counted instead.
+async def execute_rowcount(db: databases.Database, statement: PreparedStatement, **values) -> int:
+    query = statement.bind(**values)
+    if statement.returns_rows:
+        return len(await db.fetch_all(query))
+    return await db.execute(query)
+
+
+# Size an IN list is padded to: the next power of two, so lists of any length
+# share a few statement shapes instead of one per length
+def in_list_size(count: int) -> int:
+    return 1 << max(count - 1, 0).bit_length()
+
+
+_statements_by_dialect = {}
+
+
+# Returns the statement set for the SQL dialect of the given database
+def person_statements(db: databases.Database) -> PersonStatements:
+    dialect_name = db.url.dialect
+    statements = _statements_by_dialect.get(dialect_name)
+    if statements is None:
+        statements = PersonStatements(dialect_name)
+        _statements_by_dialect[dialect_name] = statements
+    return statements
@@ -0,0 +1,80 @@
+import logging
+from contextlib import nullcontext
+
+from opentelemetry import trace
+
+from models.person import person_table as Person
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+# Detail of the spans created by the application itself ([open-telemetry] detail):
+#   off      no application spans (instrumentation spans, e.g. of FastAPI, are not affected)
+#   minimal  spans with a few constant attributes: operation, table, number of rows
+#   full     also the SQL text of the statement and the values of rejected parameters
+DETAIL_LEVELS = ("off", "minimal", "full")
+
+_detail = "full"
+# "db.system" of the database spans: the SQLAlchemy dialect of the database URL
+# ("mysql", "postgresql", "sqlite"), set once at startup by set_db_system()
+_db_system = "mysql"
+
+# Returned by db_span with detail "off": reusable and does nothing
+_NO_SPAN = nullcontext(trace.INVALID_SPAN)
+
+
+def set_detail(level: str) -> None:
+    global _detail
+    if level not in DETAIL_LEVELS:
+        raise ValueError(f"Unknown span detail level '{level}', use one of: {', '.join(DETAIL_LEVELS)}")
+    _detail = level
+    logger.info("Span detail level: %s", level)
+
+
+def get_detail() -> str:
+    return _detail
+
+
+def set_db_system(dialect: str) -> None:
+    global _db_system
+    _db_system = dialect
+
+
+# True if full detail attributes should be set on the span: the level is "full" and the
+# span is recorded (sampled), so nothing is computed for spans that are dropped anyway
+def records_full_detail(span) -> bool:
+    return _detail == "full" and span.is_recording()
+
+
+# Starts the span of one database operation without making it current (e.g. for a span that
+# lives as long as a streamed response); the caller ends it. With detail "off" the span is
+# a shared no-op span. "statement" is set with detail "full" only, "attributes" (cheap values
+# such as a row count) with "minimal" and "full".
+def start_db_span(tracer, name: str, operation: str, statement: str = None, attributes: dict = None):
+    if _detail == "off":
+        return trace.INVALID_SPAN
+    return tracer.start_span(name, attributes=_db_attributes(operation, statement, attributes))
+
+
+# Context manager for the span of one database operation, current while the operation runs.
+# Same levels as start_db_span; with detail "off" no span and no context change are made.
+def db_span(tracer, name: str, operation: str, statement: str = None, attributes: dict = None):
+    if _detail == "off":
+        return _NO_SPAN
+    return tracer.start_as_current_span(name, attributes=_db_attributes(operation, statement, attributes))
+
+
+# Attributes are passed when the span starts: one dict instead of a locked set_attribute()
+# call each, and a span that is not sampled never copies them
+def _db_attributes(operation: str, statement: str, attributes: dict) -> dict:
+    span_attributes = {
+        "db.system": _db_system,
+        "db.operation": operation,
+        "db.table": Person.name,
+        "app.layer": "database",
+    }
+    if attributes:
+        span_attributes.update(attributes)
+    if statement is not None and _detail == "full":
+        span_attributes["db.statement"] = statement
+    return span_attributes
@@ -1,10 +1,13 @@
-from models.person import person_table as Person
 from fastapi import HTTPException
 import databases
-from sqlalchemy import select, update
 import logging
 from opentelemetry import trace
 
+from utils.person_cache import person_cache
+from utils.statements import person_statements, execute_rowcount
+from utils.metrics import track_db_operation
+from utils.tracing import db_span
+
 # Create a logger instance
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer(__name__)
@@ -13,46 +16,39 @@ tracer = trace.get_tracer(__name__)
 async def update_person_in_db(update_data: dict, db: databases.Database):
     logger.info("Received data for update: %s", update_data)
 
-    # Create a query to find the record in the database
-    query = (
-        select(
-            Person.c.id,
-        )
-        .select_from(Person)
-        .where(Person.c.unzr == str(update_data.get("unzr")))
-    )
-
-    # Create telemetry span for the UPDATE query
-    with tracer.start_as_current_span("DB: update person by parameter") as span:
-        span.set_attribute("db.system", "mysql")
-        span.set_attribute("db.operation", "UPDATE")
-        span.set_attribute("db.statement", str(query))
-        span.set_attribute("db.table", Person.name)
-        span.set_attribute("app.layer", "database")
-
-        person = await db.fetch_one(query)
+    unzr = str(update_data.get("unzr"))
 
-    # If the record is not found
-    if not person:
-        logger.warning("Record with UNZR %s not found", str(update_data.get("unzr")))
-        raise HTTPException(status_code=404, detail="Person not found")
+    # Bind the new values to the precompiled UPDATE ... WHERE unzr for this set of columns
+    statements = person_statements(db)
+    update_statement = statements.update_by_unzr(tuple(update_data))
+    update_values = {"new_" + key: value for key, value in update_data.items()}
 
-    logger.info("Record found for update: %s", person)
+    try:
+        # Create telemetry span for the UPDATE query
+        with db_span(tracer, "DB: update person by parameter", "UPDATE", update_statement.sql):
 
-    # Create a query to update the record
-    update_query = (
-        update(Person)
-        .where(Person.c.id == person["id"])
-        .values(**update_data)
-    )
+            with track_db_operation("UPDATE", "update_person"):
+                result = await execute_rowcount(db, update_statement, unzr=unzr, **update_values)
 
-    try:
-        result = await db.execute(update_query)
-        if result == 0:
-            logger.info("Record with ID %d did not require an update", person["id"])
+        await person_cache.invalidate(update_data)
+
+        if result:
+            logger.info("Record with UNZR %s successfully updated", unzr)
             return result
-        logger.info("Record with ID %d successfully updated", person["id"])
-        return result
+
+        # Only changed rows are counted, so 0 means either "no such UNZR" or "values already up to date".
+        # Only this path pays for a second (indexed) lookup to tell the two apart.
+        with track_db_operation("SELECT", "update_person_exists"):
+            person = await db.fetch_one(statements.select_id_by_unzr().bind(unzr=unzr))
+
     except Exception as e:
         logger.error("Error while executing update query: %s", e)
-        raise HTTPException(status_code=500, detail="Failed to update person")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to update person")
+
+    # If the record is not found
+    if not person:
+        logger.warning("Record with UNZR %s not found", unzr)
+        raise HTTPException(status_code=404, detail="Person not found")
+
+    logger.info("Record with UNZR %s did not require an update", unzr)
+    return 0
@@ -1,43 +1,139 @@
 import logging
-from models.person import PersonGet
-from typing import Any
+import re
+from datetime import date
+from models.person import PersonGet, PersonDelete
+from typing import Any, Callable, Dict, Optional
 from fastapi import HTTPException
 from opentelemetry import trace
 
+from utils.tracing import get_detail, records_full_detail
+
 # Tracer instance
 tracer = trace.get_tracer(__name__)
 
 # Create a logger instance
 logger = logging.getLogger(__name__)
 
+# Date strings that pydantic accepts for a "date" field and date.fromisoformat() parses the same way
+_ISO_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _to_date(value: str) -> date:
+    if not _ISO_DATE_PATTERN.match(value):
+        raise ValueError(value)
+    return date.fromisoformat(value)
+
+
+# Builds a check for one field of a model from its definition: length constraints,
+# type conversion and the model's @validator functions for that field.
+# The check returns True only for values the model would accept; anything else
+# (including values it cannot judge) returns False and goes to the model itself.
+def _build_field_check(model, field_name: str, field_info) -> Optional[Callable[[str], bool]]:
+    if field_info.annotation in (str, Optional[str]):
+        convert = None
+    elif field_info.annotation in (date, Optional[date]):
+        convert = _to_date
+    else:
+        return None
+
+    min_length = 0
+    max_length = None
+    for constraint in field_info.metadata:
+        min_length = getattr(constraint, "min_length", min_length)
+        max_length = getattr(constraint, "max_length", max_length)
+
+    decorators = model.__pydantic_decorators__
+    # Only pydantic v1-style @validator functions are replayed; other kinds fall back to the model
+    if any(field_name in getattr(decorator.info, "fields", ()) for decorator in decorators.field_validators.values()):
+        return None
+    if decorators.model_validators or decorators.root_validators:
+        return None
+    validators = [
+        decorator.func
+        for decorator in decorators.validators.values()
+        if field_name in decorator.info.fields and decorator.info.mode == "after"
+    ]
+
+    def check(value: str) -> bool:
+        if len(value) < min_length or (max_length is not None and len(value) > max_length):
+            return False
+        try:
+            converted = convert(value) if convert else value
+            for validate in validators:
+                converted = validate(converted, None)
+        except (ValueError, TypeError, AssertionError):
+            return False
+        return True
+
+    return check
+
+
+def _build_model_checks(model) -> Dict[str, Callable[[str], bool]]:
+    checks = {}
+    for field_name, field_info in model.model_fields.items():
+        check = _build_field_check(model, field_name, field_info)
+        if check is not None:
+            checks[field_name] = check
+    return checks
+
+
+# Per-model registry of field checks, built once at import
+_FIELD_CHECKS = {model: _build_model_checks(model) for model in (PersonGet, PersonDelete)}
+
+
 def validate_parameter(param_name: str, param_value: Any, validation_model: Any):
+    checks = _FIELD_CHECKS.get(validation_model)
+    if checks is None:
+        checks = _FIELD_CHECKS[validation_model] = _build_model_checks(validation_model)
+
+    # Fast path: a known field with a valid value
+    check = checks.get(param_name)
+    if check is not None and isinstance(param_value, str) and check(param_value):
+        return
+
+    # Unknown field or invalid value: let the model produce the error
+    validate_parameter_with_model(param_name, param_value, validation_model)
+
+
+# Validates one parameter by instantiating the whole model.
+# Slow, but produces the error messages returned to the client.
+def validate_parameter_with_model(param_name: str, param_value: Any, validation_model: Any):
+    if get_detail() == "off":
+        _validate_parameter_with_model(param_name, param_value, validation_model, trace.INVALID_SPAN)
+        return
+
     with tracer.start_as_current_span("Validate Parameter") as span:
-        span.set_attribute("param.name", param_name)
-        span.set_attribute("param.value", str(param_value))
-        span.set_attribute("validation.model", validation_model.__name__)
+        if span.is_recording():
+            span.set_attribute("param.name", param_name)
+            span.set_attribute("validation.model", validation_model.__name__)
+        if records_full_detail(span):
+            span.set_attribute("param.value", str(param_value))
+        _validate_parameter_with_model(param_name, param_value, validation_model, span)
 
-        logger.info(f"Validating parameter '{param_name}' with value '{param_value}'")
 
-        if param_name not in validation_model.__fields__:
-            error_msg = f"Parameter '{param_name}' is not a valid field of {validation_model.__name__}"
-            logger.error(error_msg)
+def _validate_parameter_with_model(param_name: str, param_value: Any, validation_model: Any, span):
+    logger.info("Validating parameter '%s' with value '%s'", param_name, param_value)
 
-            span.set_attribute("validation.error", error_msg)
-            span.set_status(trace.status.Status(trace.status.StatusCode.ERROR, description=error_msg))
+    if param_name not in validation_model.__fields__:
+        error_msg = f"Parameter '{param_name}' is not a valid field of {validation_model.__name__}"
+        logger.error(error_msg)
 
-            raise HTTPException(status_code=422, detail=error_msg)
+        span.set_attribute("validation.error", error_msg)
+        span.set_status(trace.status.Status(trace.status.StatusCode.ERROR, description=error_msg))
 
-        # Create a temporary dictionary with the value to be validated
-        temp_data = {param_name: param_value}
+        raise HTTPException(status_code=422, detail=error_msg)
 
-        try:
-            # Validate the temporary model object
-            validation_model(**temp_data)
-            logger.debug(f"Parameter '{param_name}' with value '{param_value}' is valid.")
-
-        except Exception as e:
-            error_msg = f"Validation error for parameter '{param_name}' with value '{param_value}': {e}"
-            logger.error(error_msg)
-            span.set_attribute("validation.error", str(e))
-            span.set_status(trace.status.Status(trace.status.StatusCode.ERROR, description=str(e)))
-            raise HTTPException(status_code=422, detail=error_msg)
+    # Create a temporary dictionary with the value to be validated
+    temp_data = {param_name: param_value}
+
+    try:
+        # Validate the temporary model object
+        validation_model(**temp_data)
+        logger.debug("Parameter '%s' with value '%s' is valid.", param_name, param_value)
+
+    except Exception as e:
+        error_msg = f"Validation error for parameter '{param_name}' with value '{param_value}': {e}"
+        logger.error(error_msg)
+        span.set_attribute("validation.error", str(e))
+        span.set_status(trace.status.Status(trace.status.StatusCode.ERROR, description=str(e)))
+        raise HTTPException(status_code=422, detail=error_msg)
@@ -0,0 +1,107 @@
+import contextvars
+import json
+import logging
+from dataclasses import dataclass, asdict
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from opentelemetry import trace
+
+# Create a logger instance
+logger = logging.getLogger(__name__)
+
+HEADER_LOG_MODES = ("off", "xroad", "all")
+
+# Official X-Road headers and the XRoadContext fields they are stored in
+XROAD_HEADERS = {
+    b"x-road-client": "client",
+    b"x-road-service": "service",
+    b"x-road-id": "id",
+    b"x-road-userid": "user_id",
+    b"x-road-issue": "issue",
+    b"x-road-represented-party": "represented_party",
+    b"x-road-request-hash": "request_hash",
+}
+
+# Additional Trembita query parameters and their XRoadContext fields
+XROAD_QUERY_PARAMS = {
+    "queryId": "query_id",
+    "userId": "query_user_id",
+}
+
+
+# X-Road data of one request, parsed once by XRoadContextMiddleware
+@dataclass
+class XRoadContext:
+    client: Optional[str] = None
+    service: Optional[str] = None
+    id: Optional[str] = None
+    user_id: Optional[str] = None
+    issue: Optional[str] = None
+    represented_party: Optional[str] = None
+    request_hash: Optional[str] = None
+    query_id: Optional[str] = None
+    query_user_id: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+_current_context = contextvars.ContextVar("xroad_context", default=None)
+
+
+# Returns the X-Road context of the request being handled, or None outside of a request
+def current_xroad_context() -> Optional[XRoadContext]:
+    return _current_context.get()
+
+
+# ASGI middleware that parses the X-Road headers and Trembita query parameters once per request.
+# The result is available as request.state.xroad and through current_xroad_context().
+# Depending on log_headers the headers are written as one log record:
+#   off   - nothing is logged
+#   xroad - official X-Road headers and Trembita query parameters
+#   all   - the above plus every other request header
+class XRoadContextMiddleware:
+    def __init__(self, app, log_headers: str = "all"):
+        self.app = app
+        if log_headers not in HEADER_LOG_MODES:
+            logger.warning("Unknown header logging mode '%s', using 'all'", log_headers)
+            log_headers = "all"
+        self.log_headers = log_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = XRoadContext()
+        for name, value in scope["headers"]:
+            field = XROAD_HEADERS.get(name)
+            if field is not None:
+                setattr(context, field, value.decode("latin-1"))
+
+        query_string = scope.get("query_string", b"")
+        if b"queryId=" in query_string or b"userId=" in query_string:
+            for key, value in parse_qsl(query_string.decode("latin-1")):
+                field = XROAD_QUERY_PARAMS.get(key)
+                if field is not None:
+                    setattr(context, field, value)
+
+        scope.setdefault("state", {})["xroad"] = context
+
+        if self.log_headers != "off" and logger.isEnabledFor(logging.INFO):
+            record = {"method": scope["method"], "path": scope["path"], "xroad": context.as_dict()}
+            if self.log_headers == "all":
+                record["headers"] = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+            logger.info("Request: %s", json.dumps(record, ensure_ascii=False))
+
+        span = trace.get_current_span()
+        if span.is_recording():
+            for key, value in context.as_dict().items():
+                span.set_attribute("xroad." + key, value)
+
+        token = _current_context.set(context)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_context.reset(token)
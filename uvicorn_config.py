@@ -3,11 +3,27 @@ import os
 host = os.getenv("HOST", "0.0.0.0")
 port = int(os.getenv("PORT", 8000))
 log_level = os.getenv("LOG_LEVEL", "info")
-workers = int(os.getenv("WORKERS", 4))
+# "auto" = one worker per CPU available to the container (cgroup quota), see server.py
+workers = os.getenv("WORKERS", "auto")
+# Import the application once in the supervisor before the workers are forked
+preload = os.getenv("PRELOAD", "true").strip().lower() in ("1", "true", "yes", "on")
+# A worker is replaced after this many requests (0 = never); each worker adds a random
+# 0..max_requests_jitter so that they are not all replaced at the same time
+max_requests = int(os.getenv("MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", 0))
+# A worker is replaced when its resident memory exceeds this many MiB (0 = never)
+max_worker_memory_mb = int(os.getenv("MAX_WORKER_MEMORY_MB", 0))
+# Seconds a stopping worker may spend finishing its requests before it is killed
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
 
 config = {
     "host": host,
     "port": port,
     "log_level": log_level,
     "workers": workers,
-}
\ No newline at end of file
+    "preload": preload,
+    "max_requests": max_requests,
+    "max_requests_jitter": max_requests_jitter,
+    "max_worker_memory_mb": max_worker_memory_mb,
+    "graceful_timeout": graceful_timeout,
+}
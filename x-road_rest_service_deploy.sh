@@ -10,7 +10,7 @@ DB_NAME="your_db_name"
 DB_HOST="localhost" # Using localhost for installing MariaDB on this server
 DB_PORT="3306"      # Default port for MariaDB
 SERVICE_NAME="x-road_rest_service_example"
-APP_MODULE="main:app" # Specify the correct application module
+SERVER_SCRIPT="server.py" # Production entry point: starts and supervises the worker processes
 
 # Install system dependencies
 echo "Installing system dependencies..."
@@ -63,7 +63,6 @@ sed -i "s/^password = .*/password = $DB_PASSWORD/" config.ini
 
 # Create the database schema
 echo "Creating database schema..."
-alembic revision --autogenerate -m "Init migration"
 alembic upgrade head
 
 # Create a systemd unit file
@@ -76,7 +75,10 @@ After=network.target
 [Service]
 User=$USER
 WorkingDirectory=$PWD
-ExecStart=$PWD/$VENV_DIR/bin/uvicorn $APP_MODULE --host 0.0.0.0 --port 8000
+Environment=HOST=0.0.0.0 PORT=8000
+ExecStart=$PWD/$VENV_DIR/bin/python $PWD/$SERVER_SCRIPT
+KillMode=mixed
+TimeoutStopSec=40
 Restart=always
 RestartSec=3
 